@@ -1,8 +1,9 @@
 import streamlit as st
-from src.pipeline.ingestion_pipeline import run_ingestion
-from src.llms import run_gemini
-from src.utils import format_documents
-from src.constants import PROMPT_TEMPLATES
+from src.config import check_collection_name
+from src.constants import COLLECTION_NAME
+from src.query import get_query_service
+from src.llms import GenerationTimings
+from src.metrics import configure_metrics
 from src.get_knowledge import ContentExtractor, YouTubeExtractor, ArticleExtractor, PDFExtractor
 import os
 import logging
@@ -15,6 +16,14 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 if "history" not in st.session_state:
     st.session_state.history = []
 
+@st.cache_resource
+def load_query_service():
+    """Shared across sessions and reruns; syncs data/ into Qdrant once at startup."""
+    configure_metrics()
+    service = get_query_service()
+    service.ingest()
+    return service
+
 def validate_url(url: str) -> bool:
     """Validate if the input is a valid URL."""
     try:
@@ -29,6 +38,7 @@ def main():
 
     # Sidebar for data ingestion
     st.sidebar.header("Ingest Data")
+    knowledge_base = st.sidebar.text_input("Knowledge base", COLLECTION_NAME)
     source_type = st.sidebar.selectbox("Source Type", ["YouTube", "Article", "PDF"])
     source_input = st.sidebar.text_input("Enter URL or File Path")
     uploaded_file = None
@@ -36,17 +46,24 @@ def main():
         uploaded_file = st.sidebar.file_uploader("Upload PDF", type="pdf")
 
     if st.sidebar.button("Ingest"):
+        try:
+            check_collection_name(knowledge_base)
+        except ValueError as e:
+            st.error(str(e))
+            return
         if source_type == "PDF" and uploaded_file:
             try:
                 # Save uploaded PDF temporarily
                 temp_path = "temp.pdf"
                 with open(temp_path, "wb") as f:
                     f.write(uploaded_file.getbuffer())
-                content_extractor = ContentExtractor(PDFExtractor())
+                content_extractor = ContentExtractor(PDFExtractor(workers=os.cpu_count()), knowledge_base)
                 with st.spinner("Processing PDF..."):
-                    content = content_extractor.process_source(temp_path)
+                    content = content_extractor.process_source(temp_path, source_name=uploaded_file.name)
                     os.remove(temp_path)  # Clean up
                 if content:
+                    with st.spinner("Indexing..."):
+                        load_query_service().ingest(collection_name=knowledge_base)
                     st.success("PDF ingested successfully!")
                 else:
                     st.error("Failed to extract content from PDF.")
@@ -61,12 +78,14 @@ def main():
                 extractor = {
                     "YouTube": YouTubeExtractor(),
                     "Article": ArticleExtractor(),
-                    "PDF": PDFExtractor()
+                    "PDF": PDFExtractor(workers=os.cpu_count())
                 }[source_type]
-                content_extractor = ContentExtractor(extractor)
+                content_extractor = ContentExtractor(extractor, knowledge_base)
                 with st.spinner(f"Processing {source_type}..."):
                     content = content_extractor.process_source(source_input)
                 if content and "Error" not in content:
+                    with st.spinner("Indexing..."):
+                        load_query_service().ingest(collection_name=knowledge_base)
                     st.success(f"{source_type} ingested successfully!")
                 else:
                     st.error(f"Failed to extract content: {content}")
@@ -82,20 +101,40 @@ def main():
         query = st.text_input("Enter your query", "What is the podcast about?")
     with col2:
         use_case = st.selectbox("Use Case", ["podcast_summary", "science_explainer", "code_analysis"])
+    collections = st.multiselect(
+        "Knowledge bases", load_query_service().knowledge_bases(), default=[COLLECTION_NAME]
+    )
+
+    # Optional metadata filters, applied inside Qdrant before ranking.
+    with st.expander("Filter sources"):
+        source_types = st.multiselect("Source types", ["youtube", "article", "pdf"])
+        known_sources = [source for source, _ in load_query_service().sources(collections or None)]
+        selected_sources = st.multiselect("Sources", known_sources)
+    filters = {}
+    if source_types:
+        filters["extractor"] = source_types
+    if selected_sources:
+        filters["source"] = selected_sources
 
     if st.button("Search"):
         if query:
             try:
+                st.markdown("### Response")
+                timings = GenerationTimings()
+                stream = load_query_service().ask_stream(
+                    query, use_case=use_case, k=5, timings=timings, filters=filters or None,
+                    collections=collections or None,
+                )
                 with st.spinner("Searching knowledge base..."):
-                    vector_store = run_ingestion(reset_db=False)
-                    docs = vector_store.similarity_search(query, k=5)
-                    formatted_docs = format_documents(docs)
-                    prompt = PROMPT_TEMPLATES[use_case].format(context=formatted_docs)
-                    response = run_gemini(prompt)
-                    st.markdown("### Response")
-                    st.write(response)
-                    # Save to history
-                    st.session_state.history.append({"query": query, "use_case": use_case, "response": response})
+                    # Renders each piece as it arrives and returns the full text.
+                    response = st.write_stream(stream)
+                if timings.total_ms is not None:
+                    st.caption(
+                        f"First token after {timings.time_to_first_token_ms or 0:.0f} ms, "
+                        f"complete after {timings.total_ms:.0f} ms"
+                    )
+                # Save to history (cached answers have no timings but belong there too)
+                st.session_state.history.append({"query": query, "use_case": use_case, "response": response})
             except Exception as e:
                 st.error(f"Error querying knowledge base: {e}")
         else:
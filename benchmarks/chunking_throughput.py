@@ -0,0 +1,110 @@
+"""Chunking throughput (MB/s) and peak RSS: character splitter vs streaming token chunker.
+
+    python -m benchmarks.chunking_throughput --mb 50
+    python -m benchmarks.chunking_throughput --mb 50 --tokenizer path/to/tokenizer.json
+
+Chunks one large synthetic transcript with the LangChain character splitter
+(`TextChunker` over whole pages, as ingestion used to) and with
+`StreamingChunker` over streamed blocks. Each run is a fresh process so peak
+RSS is comparable. Token statistics use the embedding model's tokenizer and
+show how many chunks the model would truncate.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from src.constants import EMBEDDING_MAX_TOKENS
+from src.rag_db.chunking import StreamingChunker, TextChunker, load_tokenizer
+from src.utils import iter_text_blocks, iter_text_pages
+
+WORDS = (
+    "the model retrieves relevant context from the vector store and the podcast "
+    "host asks about embeddings latency throughput quantization transformers "
+    "python qdrant chunk overlap batch thread runtime inference cpu memory"
+).split()
+
+
+def write_transcript(path, megabytes, seed=0):
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 30))).capitalize() + ". "
+            if rng.random() < 0.1:
+                sentence += "\n"
+            f.write(sentence)
+            written += len(sentence)
+
+
+def get_tokenizer(path):
+    if not path:
+        return load_tokenizer()
+    from tokenizers import Tokenizer
+    tokenizer = Tokenizer.from_file(path)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def run(variant, path, tokenizer_path, results):
+    tokenizer = get_tokenizer(tokenizer_path)
+    start = time.perf_counter()
+    if variant == "recursive":
+        chunks = [doc.page_content for doc in TextChunker().get_page_chunks(iter_text_pages(path))]
+    else:
+        chunker = StreamingChunker(tokenizer=tokenizer)
+        chunks = [doc.page_content for doc in chunker.split_blocks(iter_text_blocks(path))]
+    seconds = time.perf_counter() - start
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    # Token statistics on a sample, outside the timed region.
+    sample = chunks[::max(1, len(chunks) // 5000)]
+    tokens = [len(encoding.ids) + 2 for encoding in tokenizer.encode_batch(sample)]
+    results[variant] = {
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss_mb,
+        "chunks": len(chunks),
+        "mean_tokens": sum(tokens) / len(tokens),
+        "truncated": sum(n > EMBEDDING_MAX_TOKENS for n in tokens) / len(tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=int, default=20, help="Size of the synthetic transcript")
+    parser.add_argument("--tokenizer", default=None,
+                        help="tokenizer.json to use instead of downloading the embedding model's")
+    parser.add_argument("--variants", nargs="+", default=["recursive", "streaming"],
+                        choices=["recursive", "streaming"])
+    args = parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix=".txt")
+    os.close(handle)
+    try:
+        write_transcript(path, args.mb)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        context = multiprocessing.get_context("spawn")
+        results = context.Manager().dict()
+        print(f"{'variant':<10} {'MB/s':>8} {'peak RSS MB':>12} {'chunks':>9} {'tokens/chunk':>13} {'truncated':>10}")
+        for variant in args.variants:
+            process = context.Process(target=run, args=(variant, path, args.tokenizer, results))
+            process.start()
+            process.join()
+            if variant not in results:
+                print(f"{variant:<10} failed (exit code {process.exitcode})")
+                continue
+            r = results[variant]
+            print(
+                f"{variant:<10} {size_mb / r['seconds']:>8.2f} {r['peak_rss_mb']:>12.1f} {r['chunks']:>9} "
+                f"{r['mean_tokens']:>13.1f} {r['truncated']:>10.1%}"
+            )
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
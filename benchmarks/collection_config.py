@@ -0,0 +1,179 @@
+"""Memory per million chunks and recall/latency of Qdrant collection layouts.
+
+    python -m benchmarks.collection_config
+    python -m benchmarks.collection_config --server --points 200000 --layouts float32 int8 binary
+    python -m benchmarks.collection_config --vectors embeddings.npy   # real model vectors
+
+Each layout is a CollectionConfig (quantization, rescoring, on-disk storage,
+HNSW). For every layout this prints the estimated RAM and disk per million
+chunks, and recall@k against exact cosine top-k. Without --server, recall is
+simulated with NumPy: quantized scores pick the candidates, which are then
+rescored with the float vectors (no HNSW, so only the quantization error
+shows). With --server the layouts are built in the Qdrant at
+QDRANT_HOST:QDRANT_PORT (embedded Qdrant ignores these settings) and recall
+and p50/p99 latency are measured through HNSW for real.
+
+Vectors are clustered random unit vectors unless --vectors gives a .npy of
+real embeddings. Quantization error depends on the value distribution,
+binary most of all, so confirm a layout on the model's own vectors.
+"""
+import argparse
+import dataclasses
+import time
+import numpy as np
+from qdrant_client.http.models import PointStruct
+from src.constants import QDRANT_HOST, QDRANT_PORT
+from src.rag_db.vectorstore import CLIENT_FACTORIES, CollectionConfig
+from benchmarks.vector_backends import percentile
+
+COLLECTION_PREFIX = "bench_collection_"
+LAYOUTS = {
+    "float32": CollectionConfig(quantization=None),
+    "float32-disk": CollectionConfig(quantization=None, on_disk_vectors=True, on_disk_payload=True),
+    "int8": CollectionConfig(quantization="int8"),
+    "int8-disk": CollectionConfig(quantization="int8", on_disk_vectors=True, on_disk_payload=True),
+    "int8-norescore": CollectionConfig(quantization="int8", rescore=False),
+    "binary": CollectionConfig(quantization="binary"),
+    "binary-x4": CollectionConfig(quantization="binary", oversampling=4.0),
+    "binary-disk": CollectionConfig(quantization="binary", oversampling=4.0, on_disk_vectors=True,
+                                    on_disk_payload=True),
+    "binary-norescore": CollectionConfig(quantization="binary", rescore=False),
+}
+
+
+def estimate_bytes(config, dim, points, payload_bytes):
+    """(RAM, disk) bytes for `points` vectors: originals, quantized copy, HNSW links and payload."""
+    originals = points * dim * 4
+    quantized = {None: 0, "int8": points * (dim + 4), "binary": points * ((dim + 7) // 8)}[config.quantization]
+    # Level-0 links dominate: up to 2 * m neighbours per point, 4-byte ids.
+    graph = points * config.hnsw_m * 2 * 4
+    payload = points * payload_bytes
+    ram = quantized + graph
+    ram += 0 if config.on_disk_vectors else originals
+    ram += 0 if config.on_disk_payload else payload
+    return ram, originals + quantized + graph + payload
+
+
+def make_vectors(rng, points, queries, dim, clusters):
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=points)] + 0.5 * rng.standard_normal((points, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Queries near stored chunks, like a question about something that was ingested.
+    picked = vectors[rng.integers(points, size=queries)]
+    query_vectors = picked + 0.3 * rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(dim)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return vectors, query_vectors
+
+
+def exact_top_k(vectors, queries, k):
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def quantize(values, mode, bounds):
+    if mode == "int8":
+        low, high = bounds
+        levels = np.round((np.clip(values, low, high) - low) / (high - low) * 255)
+        return (levels * (high - low) / 255 + low).astype(np.float32)
+    return np.where(values > 0, 1.0, -1.0).astype(np.float32)
+
+
+def simulated_recall(config, vectors, queries, truth, k):
+    if config.quantization is None:
+        return 1.0
+    # Like Qdrant, clip the outer 1% of values before scaling to 256 levels.
+    bounds = np.quantile(vectors, [0.005, 0.995])
+    stored = quantize(vectors, config.quantization, bounds)
+    fetch = max(k, int(k * config.oversampling)) if config.rescore else k
+    hits = 0
+    for start in range(0, len(queries), 64):
+        batch = queries[start:start + 64]
+        scores = quantize(batch, config.quantization, bounds) @ stored.T
+        candidates = np.argpartition(-scores, fetch, axis=1)[:, :fetch]
+        for query, row, expected in zip(batch, candidates, truth[start:start + 64]):
+            if config.rescore:
+                row = row[np.argsort(-(vectors[row] @ query))[:k]]
+            hits += len(set(row[:k].tolist()) & expected)
+    return hits / (len(queries) * k)
+
+
+def run_server(client, name, config, vectors, queries, truth, k):
+    collection = COLLECTION_PREFIX + name
+    if client.collection_exists(collection):
+        client.delete_collection(collection)
+    client.create_collection(collection, **config.collection_params(vectors.shape[1]))
+    try:
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), 1000):
+            client.upsert(collection, points=[
+                PointStruct(id=offset + i, vector=v.tolist())
+                for i, v in enumerate(vectors[offset:offset + 1000])
+            ])
+        # Wait for the HNSW index (and quantized copy) before measuring search.
+        while client.get_collection(collection).status != "green":
+            time.sleep(0.5)
+        build_s = time.perf_counter() - start
+
+        params = config.search_params()
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            points = client.query_points(collection, query=query.tolist(), limit=k, search_params=params).points
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len({p.id for p in points} & expected)
+        return build_s, hits / (len(queries) * k), percentile(latencies, 50), percentile(latencies, 99)
+    finally:
+        client.delete_collection(collection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    parser.add_argument("--points", type=int, default=50000, help="vectors to index (recall/latency)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--vectors", help=".npy of real embeddings to use instead of random vectors")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--payload-bytes", type=int, default=1200,
+                        help="average stored payload per chunk (text and metadata) for the estimate")
+    parser.add_argument("--hnsw-m", type=int, help="override HNSW m for every layout")
+    parser.add_argument("--hnsw-ef", type=int, help="override search-time ef for every layout")
+    parser.add_argument("--server", action="store_true", help="measure in the Qdrant server, not just simulate")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        order = rng.permutation(len(vectors))
+        queries, vectors = vectors[order[:args.queries]], vectors[order[args.queries:]][:args.points]
+    else:
+        vectors, queries = make_vectors(rng, args.points, args.queries, args.dim, args.clusters)
+    dim = vectors.shape[1]
+    truth = exact_top_k(vectors, queries, args.k)
+    client = CLIENT_FACTORIES["server"](QDRANT_HOST, QDRANT_PORT, None) if args.server else None
+
+    print(f"{len(vectors)} vectors x {dim} dims, {len(queries)} queries; memory per 1M chunks "
+          f"with {args.payload_bytes} B payload each")
+    header = f"{'layout':<17} {'RAM GB':>7} {'disk GB':>8} {'recall@' + str(args.k):>9}"
+    print(header + (f" {'build s':>8} {'p50 ms':>7} {'p99 ms':>7}" if client else " (simulated)"))
+    for name in args.layouts:
+        overrides = {key: value for key, value in (("hnsw_m", args.hnsw_m), ("hnsw_ef", args.hnsw_ef)) if value}
+        config = dataclasses.replace(LAYOUTS[name], **overrides)
+        ram, disk = estimate_bytes(config, dim, 1_000_000, args.payload_bytes)
+        line = f"{name:<17} {ram / 1e9:>7.2f} {disk / 1e9:>8.2f}"
+        if client is None:
+            print(f"{line} {simulated_recall(config, vectors, queries, truth, args.k):>9.3f}")
+            continue
+        try:
+            build_s, recall, p50, p99 = run_server(client, name, config, vectors, queries, truth, args.k)
+        except Exception as e:
+            print(f"{line} skipped: {e}")
+            continue
+        print(f"{line} {recall:>9.3f} {build_s:>8.1f} {p50:>7.2f} {p99:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
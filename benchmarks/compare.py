@@ -0,0 +1,63 @@
+"""Compare two benchmark suite results side by side.
+
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<new>.json
+
+Prints every numeric result present in both files with its relative change.
+Whether a change is good depends on the metric: for *_ms, seconds and RSS
+lower is better, for *_per_second and qps higher is better; those rows are
+marked when the change exceeds --threshold.
+"""
+import argparse
+import json
+
+LOWER_IS_BETTER = ("_ms", "seconds", "rss_mb", "bytes_per_chunk")
+HIGHER_IS_BETTER = ("per_second", "qps")
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def verdict(name, change, threshold):
+    if abs(change) < threshold:
+        return ""
+    if name.endswith(HIGHER_IS_BETTER):
+        return "better" if change > 0 else "WORSE"
+    if name.endswith(LOWER_IS_BETTER):
+        return "better" if change < 0 else "WORSE"
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.05, help="relative change worth flagging")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"base {base.get('commit', '?')[:10]}{' (dirty)' if base.get('dirty') else ''}  "
+          f"new {new.get('commit', '?')[:10]}{' (dirty)' if new.get('dirty') else ''}")
+    if base.get("config", {}).get("chunks") != new.get("config", {}).get("chunks"):
+        print("warning: the runs used different corpus sizes")
+
+    new_values = dict(flatten(new.get("results", {})))
+    width = max((len(name) for name in new_values), default=10)
+    print(f"{'metric':<{width}} {'base':>12} {'new':>12} {'change':>8}")
+    for name, old in flatten(base.get("results", {})):
+        if name not in new_values:
+            continue
+        value = new_values[name]
+        change = (value - old) / old if old else 0.0
+        print(f"{name:<{width}} {old:>12.4g} {value:>12.4g} {change:>+8.1%} {verdict(name, change, args.threshold)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Synthetic transcripts, articles and PDF extracts for benchmarks.
+
+Documents are written the way the extractors leave them in data/: one `.txt`
+per source (PDF pages separated by PDF_PAGE_SEPARATOR) with a `.meta.json`
+sidecar. Text mixes common English words with rarer per-topic terms drawn
+from a Zipf distribution, so BM25 and embeddings see realistic skew and
+queries cut from documents have a known source.
+"""
+import itertools
+import os
+import random
+import time
+from src.constants import PDF_PAGE_SEPARATOR
+from src.utils import hash_text, write_source_metadata
+
+COMMON_WORDS = (
+    "the of and to in is that it for on was with as be at by this had not are but from or have an "
+    "they which one you were all we there can more when what so about if out some into time would "
+    "people like just also model data training question answer episode guest host talk think know "
+    "really different research system problem work learning science energy climate market product "
+    "company build code function memory latency search vector language network result example point"
+).split()
+SYLLABLES = "ka lo mi ren tus vel dor pa xi quo bran sel tem nor fi gal zu ver mo tra".split()
+SOURCE_TYPES = ("youtube", "article", "pdf")
+
+
+def make_terms(rng, count):
+    terms = set()
+    while len(terms) < count:
+        terms.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(terms)
+
+
+class SyntheticCorpus:
+    """Deterministic generator; the same seed always writes the same corpus."""
+
+    def __init__(self, seed=0, topics=50, terms_per_topic=40, words_per_chunk=90):
+        self.seed = seed
+        self.words_per_chunk = words_per_chunk
+        rng = random.Random(seed)
+        terms = make_terms(rng, topics * terms_per_topic)
+        rng.shuffle(terms)
+        self.topics = [terms[i::topics] for i in range(topics)]
+        self.vocabulary = COMMON_WORDS + terms
+        self._common_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(COMMON_WORDS) + 1)))
+
+    def _sentence(self, rng, topic):
+        length = rng.randint(6, 24)
+        words = rng.choices(COMMON_WORDS, cum_weights=self._common_weights, k=length)
+        for i in rng.sample(range(length), length // 4):
+            words[i] = rng.choice(topic)
+        return " ".join(words).capitalize() + rng.choice("...?")
+
+    def _paragraph(self, rng, topic, words):
+        sentences = []
+        count = 0
+        while count < words:
+            sentence = self._sentence(rng, topic)
+            sentences.append(sentence)
+            count += sentence.count(" ") + 1
+        return " ".join(sentences)
+
+    def document(self, rng, source_type, words):
+        topic = rng.choice(self.topics)
+        if source_type == "youtube":
+            # Transcripts: short unpunctuated-looking lines, one per caption.
+            text = self._paragraph(rng, topic, words)
+            tokens = text.split()
+            return "\n".join(" ".join(tokens[i:i + 12]) for i in range(0, len(tokens), 12))
+        if source_type == "article":
+            paragraphs = max(1, words // 120)
+            return "\n\n".join(self._paragraph(rng, topic, words // paragraphs) for _ in range(paragraphs))
+        pages = max(1, words // 350)
+        return PDF_PAGE_SEPARATOR.join(self._paragraph(rng, topic, words // pages) for _ in range(pages))
+
+    def write(self, data_dir, target_chunks, duplicate_rate=0.0, words_per_doc=(600, 6000)):
+        """Write documents until about `target_chunks` chunks' worth of text exists.
+
+        A `duplicate_rate` share of documents re-publishes an earlier one under
+        a new source (same text), which ingestion should deduplicate.
+        Returns a summary dict.
+        """
+        rng = random.Random(self.seed + 1)
+        counts = dict.fromkeys(SOURCE_TYPES, 0)
+        written = []
+        words_total = 0
+        size = 0
+        target_words = target_chunks * self.words_per_chunk
+        duplicates = 0
+        for i in itertools.count():
+            if words_total >= target_words:
+                break
+            source_type = SOURCE_TYPES[i % len(SOURCE_TYPES)]
+            if written and rng.random() < duplicate_rate:
+                text = open(rng.choice(written), encoding="utf-8").read()
+                duplicates += 1
+            else:
+                text = self.document(rng, source_type, rng.randint(*words_per_doc))
+                words_total += text.count(" ") + text.count("\n") + 1
+            directory = os.path.join(data_dir, f"{source_type}_data")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{source_type}_{i:07d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            source = f"https://example.com/{source_type}/{i}"
+            write_source_metadata(path, {
+                "source": source,
+                "extractor": source_type,
+                "document_id": hash_text(source),
+                "extracted_at": time.time(),
+            })
+            written.append(path)
+            counts[source_type] += 1
+            size += len(text.encode("utf-8"))
+        return {"files": len(written), "duplicates": duplicates, "bytes": size, "by_type": counts}
+
+    def queries(self, count, seed=None):
+        """Short keyword queries that mix topic terms with common words."""
+        rng = random.Random(self.seed + 2 if seed is None else seed)
+        queries = []
+        for _ in range(count):
+            topic = rng.choice(self.topics)
+            words = rng.sample(topic, 2) + rng.sample(COMMON_WORDS, 3)
+            rng.shuffle(words)
+            queries.append(" ".join(words))
+        return queries
@@ -0,0 +1,61 @@
+"""Embedding throughput (chunks/sec) per backend and batch size on CPU.
+
+    python -m benchmarks.embedding_throughput --chunks 2000 --backends torch onnx onnx-int8
+
+The embedding cache is disabled so every chunk goes through the model. The
+ONNX backends need `sentence-transformers[onnx]` (optimum + onnxruntime).
+"""
+import argparse
+import random
+import time
+from src.constants import CHUNK_SIZE
+from src.rag_db.embedding import EMBEDDING_BACKENDS, Embedder
+
+WORDS = (
+    "the model retrieves relevant context from the vector store and the podcast "
+    "host asks about embeddings latency throughput quantization transformers "
+    "python qdrant chunk overlap batch thread runtime inference cpu memory"
+).split()
+
+
+def synthetic_chunks(count, seed=0):
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        text = f"{i} "
+        while len(text) < CHUNK_SIZE:
+            text += rng.choice(WORDS) + " "
+        chunks.append(text[:CHUNK_SIZE])
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[16, 32, 64, 128])
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    print(f"{'backend':<10} {'batch':>6} {'load s':>8} {'chunks/s':>10}")
+    for backend in args.backends:
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            try:
+                embedder = Embedder(use_cache=False, backend=backend, batch_size=batch_size,
+                                    num_threads=args.threads)
+            except Exception as e:
+                print(f"{backend:<10} {batch_size:>6} unavailable: {e}")
+                break
+            load_s = time.perf_counter() - start
+            embedder.model.embed_documents(chunks[:batch_size])  # warm-up
+
+            start = time.perf_counter()
+            embedder.model.embed_documents(chunks)
+            rate = len(chunks) / (time.perf_counter() - start)
+            print(f"{backend:<10} {batch_size:>6} {load_s:>8.1f} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""HTML-to-text throughput (pages/s, MB/s) and parity of the article extraction engines.
+
+    python -m benchmarks.html_extraction --pages path/to/saved_pages
+    python -m benchmarks.html_extraction --synthetic 200
+
+Runs every engine in src.html_extraction over a directory of saved `.html`
+pages (or generated article and Wikipedia-style pages) and compares each
+engine's paragraphs with the BeautifulSoup engine's. Name saved pages after
+their URL (e.g. `en.wikipedia.org_wiki_Python.html`) so the Wikipedia rules
+apply to them.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from src.html_extraction import HTML_ENGINES
+
+WORDS = (
+    "the model retrieves relevant context from the vector store while the host asks about "
+    "embeddings latency throughput quantization transformers python qdrant chunk overlap"
+).split()
+
+
+def sentence(rng, words=14):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_page(rng, paragraphs, wikipedia=False):
+    def para():
+        # Inline markup and entities, as real pages have.
+        text = " ".join(sentence(rng) for _ in range(rng.randint(2, 6)))
+        words = text.split(" ")
+        words[1] = f"<b>{words[1]}</b>"
+        words[3] = f"<a href='#'>{words[3]}</a>&nbsp;"
+        return " ".join(words)
+
+    body = ["<header><p>Site header with a long enough tagline to count</p></header>",
+            "<nav><ul>" + "".join(f"<li>Navigation entry number {i} of the menu</li>" for i in range(30)) + "</ul></nav>"]
+    body.append("<div id='content'><h1>Synthetic article about retrieval systems</h1>")
+    for i in range(paragraphs):
+        if i % 12 == 0:
+            edit = "<span class='mw-editsection'>[edit source for this section]</span>" if wikipedia else ""
+            body.append(f"<h2>Section {i} on vector search engines{edit}</h2>")
+        body.append(f"<p>{para()}</p>")
+        if i % 20 == 5:
+            body.append("<ul>" + "".join(f"<li>{sentence(rng)}</li>" for _ in range(4)) + "</ul>")
+        if i % 30 == 7:
+            body.append("<script>var tracking = 'x'.repeat(100);</script><!-- a comment -->")
+    if wikipedia:
+        for heading in ("See also", "References", "External links"):
+            body.append(f"<h2>{heading}</h2>")
+            body.append("<div class='reflist'><ol>" + "".join(
+                f"<li>Reference {i}: {sentence(rng)}</li>" for i in range(paragraphs)) + "</ol></div>")
+            body.append("".join(f"<p>Trailing {heading.lower()} text {sentence(rng)}</p>" for _ in range(20)))
+        body.append("<div class='navbox'><p>Navigation box with many related article links</p></div>")
+    body.append("</div><aside><p>Sidebar content that should never be extracted</p></aside>")
+    body.append("<footer><p>Footer text with copyright notice and links</p></footer>")
+    return "<!DOCTYPE html><html><head><meta charset='utf-8'><title>t</title><style>p{}</style></head><body>" + \
+        "\n".join(body) + "</body></html>"
+
+
+def write_synthetic(directory, count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        wikipedia = i % 2 == 0
+        name = f"en.wikipedia.org_wiki_Page_{i}.html" if wikipedia else f"example.com_article_{i}.html"
+        paragraphs = rng.choice((20, 80, 300, 1500))
+        (Path(directory) / name).write_text(synthetic_page(rng, paragraphs, wikipedia), encoding="utf-8")
+
+
+def extract(engine, path):
+    with open(path, "rb") as body:
+        return list(engine.iter_text(body, None, path.name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", help="directory of saved .html pages")
+    parser.add_argument("--synthetic", type=int, default=100, help="pages to generate when --pages is not given")
+    parser.add_argument("--engines", nargs="+", default=list(HTML_ENGINES), choices=list(HTML_ENGINES))
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus; the fastest counts")
+    args = parser.parse_args()
+
+    directory = args.pages
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="html-pages-")
+        write_synthetic(directory, args.synthetic)
+    pages = sorted(Path(directory).glob("*.htm*"))
+    size_mb = sum(os.path.getsize(page) for page in pages) / (1024 * 1024)
+    print(f"{len(pages)} pages, {size_mb:.1f} MB")
+
+    outputs = {}
+    print(f"{'engine':<6} {'pages/s':>9} {'MB/s':>8} {'paragraphs':>11}")
+    for name in args.engines:
+        engine = HTML_ENGINES[name]()
+        try:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = [extract(engine, page) for page in pages]
+                seconds = time.perf_counter() - start
+                best = seconds if best is None else min(best, seconds)
+        except ImportError as e:
+            print(f"{name:<6} unavailable ({e})")
+            continue
+        outputs[name] = results
+        print(f"{name:<6} {len(pages) / best:>9.1f} {size_mb / best:>8.2f} {sum(map(len, results)):>11}")
+
+    reference = outputs.get("bs4")
+    for name, results in outputs.items():
+        if reference is None or name == "bs4":
+            continue
+        identical = sum(a == b for a, b in zip(results, reference))
+        overlaps = []
+        for page, a, b in zip(pages, results, reference):
+            union = set(a) | set(b)
+            overlaps.append((len(set(a) & set(b)) / len(union) if union else 1.0, page.name))
+        overlaps.sort()
+        print(f"parity {name} vs bs4: {identical}/{len(pages)} pages identical, "
+              f"mean paragraph overlap {sum(o for o, _ in overlaps) / len(overlaps):.1%}")
+        for overlap, page in overlaps[:5]:
+            if overlap < 1.0:
+                print(f"    {overlap:6.1%}  {page}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Import-time budget check for the CLI, server and app entry points.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --scale 2   # slower CI machine
+
+Imports each entry module (`main.py`, `app.py` and the modules behind the
+server and ingestion CLIs) in a fresh `python -X importtime` process and
+exits with status 1 if any takes longer than its budget, fails to import,
+or pulls in one of the heavy dependencies that must only load on first
+use: the embedding model stack, the PDF/HTML/transcript extractors, the
+Qdrant client and the Gemini SDK. That makes it usable as a CI step. The
+slowest modules are listed so a regression is easy to trace.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budget per entry module, in milliseconds.
+BUDGETS_MS = {
+    "main": 300,
+    "app": 300,
+    "src.query": 300,
+    "src.server": 300,
+    "src.llms": 150,
+    "src.get_knowledge": 150,
+    "src.pipeline.bulk_ingestion": 200,
+}
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "langchain_community",
+    "langchain_qdrant",
+    "qdrant_client",
+    "pdfplumber",
+    "bs4",
+    "youtube_transcript_api",
+    "google.generativeai",
+)
+# Framework imports an entry module cannot avoid; their time is not counted
+# against its budget.
+FRAMEWORK_MODULES = {
+    "app": ("streamlit",),
+}
+
+
+def measure(module):
+    """Returns ({imported_module: cumulative_ms}, error) for one cold import of `module`.
+
+    Only modules imported on behalf of `module` are included, not the ones
+    the interpreter loads at startup (site, .pth hooks).
+    """
+    # Run outside the repo so entry modules that create directories on import
+    # (main.py makes logs/) leave the checkout alone.
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))}
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, env=env, capture_output=True, text=True, check=False,
+        )
+    if result.returncode:
+        return {}, result.stderr.strip().splitlines()[-1]
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nesting is shown as two spaces of indentation per level.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative) / 1000))
+    # -X importtime lists a module after everything it imported, so the
+    # entry module's subtree is the nested run of lines right before it.
+    end = max(i for i, (name, depth, _) in enumerate(entries) if name == module and depth == 0)
+    start = end
+    while start > 0 and entries[start - 1][1] > 0:
+        start -= 1
+    return {name: ms for name, _, ms in entries[start:end + 1]}, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS), help="entry modules to check")
+    parser.add_argument("--runs", type=int, default=3, help="imports per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    failures = 0
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.runs)]
+        errors = [error for _, error in runs if error]
+        if errors:
+            print(f"FAIL {module}: import failed: {errors[0]}")
+            failures += 1
+            continue
+        times = min((times for times, _ in runs), key=lambda t: t.get(module, 0.0))
+        framework = sum(times.get(name, 0.0) for name in FRAMEWORK_MODULES.get(module, ()))
+        total = times.get(module, 0.0) - framework
+        budget = BUDGETS_MS.get(module, 300) * args.scale
+        heavy = sorted(h for h in HEAVY_MODULES if any(name == h or name.startswith(h + ".") for name in times))
+        ok = total <= budget and not heavy
+        failures += not ok
+        excluded = f", plus {framework:.0f} ms of {', '.join(FRAMEWORK_MODULES[module])}" if framework else ""
+        print(f"{'ok  ' if ok else 'FAIL'} {module}: {total:.0f} ms (budget {budget:.0f} ms{excluded})")
+        if heavy:
+            print(f"     imports heavy dependencies eagerly: {', '.join(heavy)}")
+        slowest = sorted(((ms, name) for name, ms in times.items() if name != module), reverse=True)
+        for ms, name in slowest[:args.top]:
+            print(f"     {ms:8.1f} ms  {name}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Load test for the HTTP query server: QPS and latency percentiles.
+
+    python -m benchmarks.load_test --endpoint search --concurrency 32 --duration 10
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --endpoint ask
+
+Without --url, a server is started in-process against the embedded in-memory
+Qdrant and the stub LLM, seeded with a synthetic corpus of --docs transcripts.
+It runs in a temporary directory, so the embedding, BM25 and response caches
+start empty and the repo's `.cache` is never read. The response cache is also
+off by default, so /ask latency covers retrieval and generation rather than
+cache lookups; --response-cache turns it on. The embedder backend
+(EMBEDDING_BACKEND) is printed with the results.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+WORDS = (
+    "episode guest host model training data vector search latency python qdrant "
+    "embedding transformer science climate energy startup founder product code "
+    "function class async server cache memory benchmark throughput"
+).split()
+
+
+def synthetic_text(rng, words=2000):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+async def worker(host, port, path, queries, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            body = json.dumps({"query": random.choice(queries), "k": 5}).encode("utf-8")
+            request = (
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1") + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def run(args):
+    server = query_server = None
+    embedder = response_cache_state = "as configured on the server"
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        # Must be set before src.constants is imported.
+        os.environ.setdefault("QDRANT_BACKEND", "memory")
+        os.environ.setdefault("LLM_BACKEND", "stub")
+        # Every cache lives under the relative CACHE_DIR_NAME; start them all empty.
+        work_dir = tempfile.mkdtemp(prefix="load-test-")
+        os.chdir(work_dir)
+        from src.pipeline.ingestion_pipeline import run_ingestion
+        from src.pipeline.manifest import IngestionManifest
+        from src.query import QueryService
+        from src.response_cache import ResponseCache
+        from src.server import QueryServer
+
+        rng = random.Random(0)
+        data_dir = os.path.join(work_dir, "data")
+        os.makedirs(os.path.join(data_dir, "synthetic"))
+        for i in range(args.docs):
+            with open(os.path.join(data_dir, "synthetic", f"doc_{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(synthetic_text(rng))
+        # Without --response-cache, nothing is kept: no similarity lookups, no entries.
+        response_cache = None if args.response_cache else ResponseCache(max_entries=0, similarity_threshold=0)
+        service = QueryService(response_cache=response_cache)
+        embedder = f"{service.embedder.backend} ({service.embedder.model_name})"
+        response_cache_state = "on" if args.response_cache else "off"
+        run_ingestion(
+            vector_store=service.vector_store, data_dir=data_dir,
+            manifest=IngestionManifest(os.path.join(data_dir, "manifest.json")),
+        )
+        query_server = QueryServer(service, max_concurrency=args.server_concurrency)
+        host, port = "127.0.0.1", 0
+        server = await query_server.start(host, port)
+        port = server.sockets[0].getsockname()[1]
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(6)) for _ in range(args.unique_queries)]
+    latencies, statuses = [], Counter()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        worker(host, port, f"/{args.endpoint}", queries, deadline, latencies, statuses)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    if server:
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    ok = statuses.get(200, 0)
+    print(f"{args.endpoint}: {len(latencies)} requests in {elapsed:.1f}s, {ok / elapsed:.1f} QPS (200 only)")
+    if latencies:
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"latency p50 {statistics.median(latencies):.1f} ms, p99 {p99:.1f} ms")
+    print(f"status codes: {dict(statuses)}")
+    print(f"embedder: {embedder}; response cache: {response_cache_state}")
+    if query_server and query_server.batcher.batches:
+        batcher = query_server.batcher
+        print(f"embedding batches: {batcher.batches}, avg size {batcher.queries / batcher.batches:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="existing server; omit to start one in-process")
+    parser.add_argument("--endpoint", choices=["search", "ask"], default="search")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent client connections")
+    parser.add_argument("--server-concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--unique-queries", type=int, default=200)
+    parser.add_argument("--response-cache", action="store_true",
+                        help="let the in-process server answer repeated /ask queries from its response cache")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Cold-start vs warm query latency for the query path.
+
+Needs a running Qdrant with an ingested collection:
+
+    python -m benchmarks.query_latency --runs 20 --query "What is the podcast about?"
+
+"cold" includes loading the embedding model and connecting to Qdrant; "warm"
+is embedding the query plus the ANN search on the already initialized service.
+"""
+import argparse
+import statistics
+import time
+from src.query import QueryService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--query", default="What is the podcast about?")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    service = QueryService()
+    start = time.perf_counter()
+    service.search(args.query, k=args.k)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    warm_ms = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        service.search(args.query, k=args.k)
+        warm_ms.append((time.perf_counter() - start) * 1000)
+    warm_ms.sort()
+
+    print(f"cold start + first query: {cold_ms:9.1f} ms")
+    print(f"warm query p50:           {statistics.median(warm_ms):9.1f} ms")
+    print(f"warm query max:           {warm_ms[-1]:9.1f} ms  ({args.runs} runs)")
+
+
+if __name__ == "__main__":
+    main()
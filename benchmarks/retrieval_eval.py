@@ -0,0 +1,80 @@
+"""Recall@k and latency of dense, sparse (BM25) and hybrid retrieval.
+
+    python -m benchmarks.retrieval_eval --qrels eval/qrels.jsonl -k 5
+    python -m benchmarks.retrieval_eval --synthetic 200 -k 5
+
+A qrels file has one JSON object per line: {"query": "...", "relevant": [...]},
+where relevant entries are chunk hashes (the `hash` payload field) or point IDs.
+Without one, --synthetic samples stored chunks and queries each with a short
+span of its own text (known-item retrieval).
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from src.rag_db.embedding import get_embedder
+from src.rag_db.vectorstore import VectorStoreManager
+from src.utils import hash_to_point_id
+
+MODES = ("dense", "sparse", "hybrid")
+
+
+def load_qrels(path):
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                relevant = {r if "-" in r else hash_to_point_id(r) for r in item["relevant"]}
+                queries.append((item["query"], relevant))
+    return queries
+
+
+def synthetic_qrels(vector_store, count, span=8, seed=0):
+    rng = random.Random(seed)
+    points, _ = vector_store.client.scroll(
+        collection_name=vector_store.collection_name, limit=count * 5,
+        with_payload=["page_content"], with_vectors=False,
+    )
+    queries = []
+    for point in rng.sample(points, min(count, len(points))):
+        words = point.payload["page_content"].split()
+        if len(words) < span:
+            continue
+        start = rng.randrange(len(words) - span + 1)
+        queries.append((" ".join(words[start:start + span]), {str(point.id)}))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qrels")
+    parser.add_argument("--synthetic", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    vector_store = VectorStoreManager(get_embedder())
+    queries = load_qrels(args.qrels) if args.qrels else synthetic_qrels(vector_store, args.synthetic)
+    if not queries:
+        raise SystemExit("No queries to evaluate; ingest some documents first")
+    vector_store.sparse_index  # build/load outside the timed loop
+
+    print(f"{len(queries)} queries, k={args.k}")
+    print(f"{'mode':<8} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in MODES:
+        found = total = 0
+        latencies = []
+        for query, relevant in queries:
+            start = time.perf_counter()
+            docs = vector_store.search(query, k=args.k, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found += len(relevant & {doc.metadata["_id"] for doc in docs})
+            total += len(relevant)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{mode:<8} {found / total:>9.3f} {statistics.median(latencies):>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
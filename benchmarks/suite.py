@@ -0,0 +1,292 @@
+"""End-to-end benchmark: ingestion, dedup, query latency and memory on a synthetic corpus.
+
+    python -m benchmarks.suite --chunks 10000
+    python -m benchmarks.suite --chunks 1000000 --embedder onnx-int8
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<new>.json
+
+Generates transcripts, articles and PDF extracts worth about --chunks chunks
+(see benchmarks/corpus.py) and runs the real ingestion pipeline and query
+service against the embedded in-memory Qdrant and the stub LLM, so numbers
+depend on the code, not on a server or API quota. By default embeddings are
+the model-free "hash" backend, which isolates everything around the model;
+pass --embedder torch/onnx/onnx-int8 to include it. --tokenizer synthetic
+trains a small WordPiece vocabulary on the corpus instead of downloading the
+embedding model's tokenizer.
+
+Phases:
+    ingest   cold ingestion of the whole corpus (chunks/s, MB/s, per-stage gauges)
+    rerun    a second run with nothing changed (manifest short-circuit)
+    dedup    every file copied under a new name and re-ingested: all chunks
+             are already stored, so this is the cost of hashing and lookups
+    query    dense/sparse/hybrid search latency (p50/p95/p99) and QPS
+    ask      retrieval + prompt building + stub LLM, time to first token
+    memory   RSS after loading, peak RSS and bytes per stored chunk
+
+Results are written as JSON (commit, environment, config, results and the
+metrics registry) to benchmarks/results/<commit>-<chunks>.json unless
+--output is given; compare two runs with benchmarks.compare.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+QUERY_MODES = ("dense", "sparse", "hybrid")
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(latencies_ms):
+    ordered = sorted(latencies_ms)
+    if not ordered:
+        return {}
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def train_tokenizer(corpus, path):
+    """A small WordPiece vocabulary over the corpus, in place of the model's tokenizer."""
+    from tokenizers import BertWordPieceTokenizer, Tokenizer
+
+    trainer = BertWordPieceTokenizer(lowercase=True)
+    trainer.train_from_iterator([" ".join(corpus.vocabulary)] * 10, vocab_size=8000, min_frequency=1, show_progress=False)
+    trainer.save(str(path))
+    tokenizer = Tokenizer.from_file(str(path))
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def load_tokenizer_file(path):
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_file(path)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def copy_corpus(data_dir):
+    """Re-publish every file under a new name and source, keeping its text."""
+    copies = 0
+    for path in sorted(Path(data_dir).glob("*_data/*.txt")):
+        target = path.with_name(f"copy_{path.name}")
+        shutil.copyfile(path, target)
+        meta = path.with_suffix(".meta.json")
+        if meta.exists():
+            metadata = json.loads(meta.read_text(encoding="utf-8"))
+            metadata["source"] += "#copy"
+            target.with_suffix(".meta.json").write_text(json.dumps(metadata), encoding="utf-8")
+        copies += 1
+    return copies
+
+
+def time_ingestion(run_ingestion, **kwargs):
+    start = time.perf_counter()
+    run_ingestion(**kwargs)
+    return time.perf_counter() - start
+
+
+def stage_gauges(snapshot):
+    """Per-stage throughput and utilization from the last pipeline run."""
+    stages = {}
+    for name, value in snapshot["gauges"].items():
+        for gauge in ("ingest_stage_units_per_second", "ingest_stage_utilization"):
+            if name.startswith(gauge + "{"):
+                stage = name.split('stage="', 1)[1].split('"', 1)[0]
+                stages.setdefault(stage, {})[gauge.removeprefix("ingest_stage_")] = value
+    return stages
+
+
+def run(args):
+    # Must be set before src.constants is imported.
+    os.environ["QDRANT_BACKEND"] = "memory"
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["EMBEDDING_BACKEND"] = args.embedder
+    from benchmarks.corpus import SyntheticCorpus
+    from src.llms import GenerationTimings
+    from src.metrics import metrics
+    from src.pipeline.ingestion_pipeline import run_ingestion
+    from src.pipeline.manifest import IngestionManifest
+    from src.query import QueryService
+    from src.rag_db.chunking import StreamingChunker
+    from src.response_cache import ResponseCache
+
+    workdir = Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    # Embedding cache, sparse index and manifest all live under .cache/.
+    os.chdir(workdir)
+    data_dir = workdir / "data"
+    results = {}
+    try:
+        baseline_rss = current_rss_mb()
+        corpus = SyntheticCorpus(seed=args.seed)
+        start = time.perf_counter()
+        summary = corpus.write(data_dir, args.chunks, duplicate_rate=args.duplicate_rate)
+        summary["seconds"] = time.perf_counter() - start
+        results["corpus"] = summary
+        print(f"corpus: {summary['files']} files, {summary['bytes'] / 1e6:.1f} MB in {summary['seconds']:.1f}s")
+
+        if args.tokenizer == "synthetic":
+            tokenizer = train_tokenizer(corpus, workdir / "tokenizer.json")
+        elif args.tokenizer == "model":
+            tokenizer = None
+        else:
+            tokenizer = load_tokenizer_file(args.tokenizer)
+        chunker = StreamingChunker(tokenizer=tokenizer)
+        chunker.tokenizer  # load outside the timed region
+
+        service = QueryService(rerank=False, response_cache=ResponseCache(":memory:", similarity_threshold=None))
+        vector_store = service.vector_store
+        manifest = IngestionManifest(str(workdir / "manifest.json"))
+        ingest = dict(vector_store=vector_store, manifest=manifest, data_dir=str(data_dir), chunker=chunker)
+        loaded_rss = current_rss_mb()
+
+        metrics.reset()
+        seconds = time_ingestion(run_ingestion, **ingest)
+        chunks = vector_store.count()
+        results["ingest"] = {
+            "seconds": seconds,
+            "chunks": chunks,
+            "chunks_per_second": chunks / seconds,
+            "mb_per_second": summary["bytes"] / 1e6 / seconds,
+            "stages": stage_gauges(metrics.snapshot()),
+        }
+        print(f"ingest: {chunks} chunks in {seconds:.1f}s ({chunks / seconds:.0f} chunks/s)")
+
+        seconds = time_ingestion(run_ingestion, **ingest)
+        results["rerun"] = {"seconds": seconds}
+        print(f"rerun (no changes): {seconds:.2f}s")
+
+        copies = copy_corpus(data_dir)
+        seconds = time_ingestion(run_ingestion, **ingest)
+        results["dedup"] = {
+            "files": copies,
+            "seconds": seconds,
+            "chunks_per_second": chunks / seconds,
+            "new_chunks": vector_store.count() - chunks,
+        }
+        print(f"dedup: {copies} copied files re-ingested in {seconds:.1f}s ({chunks / seconds:.0f} chunks/s)")
+
+        queries = corpus.queries(args.queries)
+        results["query"] = {}
+        for mode in QUERY_MODES:
+            for query in queries[:10]:
+                vector_store.search(query, k=args.k, mode=mode)
+            latencies = []
+            start = time.perf_counter()
+            for query in queries:
+                t = time.perf_counter()
+                vector_store.search(query, k=args.k, mode=mode)
+                latencies.append((time.perf_counter() - t) * 1000)
+            stats = percentiles(latencies)
+            stats["qps"] = len(queries) / (time.perf_counter() - start)
+            results["query"][mode] = stats
+            print(f"query {mode:<7} p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms  {stats['qps']:.0f} QPS")
+
+        first_token, total = [], []
+        for query in corpus.queries(args.ask_queries, seed=args.seed + 100):
+            first = None
+            start = time.perf_counter()
+            for _ in service.ask_stream(query, k=args.k, timings=GenerationTimings()):
+                if first is None:
+                    first = (time.perf_counter() - start) * 1000
+            first_token.append(first)
+            total.append((time.perf_counter() - start) * 1000)
+        results["ask"] = {"first_token": percentiles(first_token), "total": percentiles(total)}
+        print(f"ask: first token p50 {results['ask']['first_token']['p50_ms']:.1f} ms (stub LLM)")
+
+        stored = vector_store.count()
+        results["memory"] = {
+            "baseline_rss_mb": baseline_rss,
+            "loaded_rss_mb": loaded_rss,
+            "final_rss_mb": current_rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+            "bytes_per_chunk": (current_rss_mb() - loaded_rss) * 1024 * 1024 / stored if stored else None,
+        }
+        print(f"memory: peak RSS {results['memory']['peak_rss_mb']:.0f} MB")
+        return results, metrics.snapshot()
+    finally:
+        os.chdir(REPO_ROOT)
+        if args.keep:
+            print(f"kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10000, help="approximate corpus size in chunks")
+    parser.add_argument("--embedder", default="hash", choices=["hash", "torch", "onnx", "onnx-int8"])
+    parser.add_argument("--tokenizer", default="synthetic",
+                        help='"synthetic", "model" (the embedding model\'s) or a tokenizer.json path')
+    parser.add_argument("--queries", type=int, default=500, help="queries per search mode")
+    parser.add_argument("--ask-queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05,
+                        help="share of documents that repeat an earlier one under a new source")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>-<chunks>.json)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated corpus and caches")
+    args = parser.parse_args()
+    if args.tokenizer not in ("synthetic", "model"):
+        args.tokenizer = os.path.abspath(args.tokenizer)
+
+    revision = git_revision()
+    output = Path(args.output).resolve() if args.output else RESULTS_DIR / f"{revision['commit'][:10]}-{args.chunks}.json"
+    results, snapshot = run(args)
+    report = {
+        **revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "argv": sys.argv[1:],
+        },
+        "config": vars(args),
+        "results": results,
+        "metrics": snapshot,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Recall@k and p50/p99 search latency for each Qdrant backend.
+
+    python -m benchmarks.vector_backends --points 20000 --queries 200 --backends memory local server
+
+Uses random unit vectors, so no embedding model is needed. Recall is measured
+against exact brute-force cosine top-k computed with NumPy. The "server"
+backend needs a Qdrant at QDRANT_HOST:QDRANT_PORT and is skipped otherwise.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+from src.constants import QDRANT_HOST, QDRANT_PORT
+from src.rag_db.vectorstore import CLIENT_FACTORIES
+
+COLLECTION = "bench_vector_backends"
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values), q))
+
+
+def run_backend(backend, vectors, queries, k):
+    path = tempfile.mkdtemp(prefix="qdrant-bench-")
+    try:
+        client = CLIENT_FACTORIES[backend](QDRANT_HOST, QDRANT_PORT, path)
+        if client.collection_exists(COLLECTION):
+            client.delete_collection(COLLECTION)
+        client.create_collection(
+            COLLECTION, vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE)
+        )
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), 1000):
+            client.upsert(COLLECTION, points=[
+                PointStruct(id=offset + i, vector=v.tolist())
+                for i, v in enumerate(vectors[offset:offset + 1000])
+            ])
+        upsert_s = time.perf_counter() - start
+
+        exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+        latencies, hits = [], 0
+        for query, truth in zip(queries, exact):
+            start = time.perf_counter()
+            points = client.query_points(COLLECTION, query=query.tolist(), limit=k).points
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len({p.id for p in points} & set(truth.tolist()))
+        client.delete_collection(COLLECTION)
+        client.close()
+        return upsert_s, hits / (len(queries) * k), percentile(latencies, 50), percentile(latencies, 99)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=list(CLIENT_FACTORIES), choices=list(CLIENT_FACTORIES))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.points, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"{'backend':<8} {'upsert s':>9} {'recall@' + str(args.k):>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for backend in args.backends:
+        try:
+            upsert_s, recall, p50, p99 = run_backend(backend, vectors, queries, args.k)
+        except Exception as e:
+            print(f"{backend:<8} skipped: {e}")
+            continue
+        print(f"{backend:<8} {upsert_s:>9.1f} {recall:>9.3f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,8 @@
 import logging
 from dotenv import load_dotenv
-from src.pipeline.ingestion_pipeline import run_ingestion
-from src.utils import format_documents
+from src.metrics import configure_metrics
+from src.query import get_query_service
 import os
-from src.llms import run_gemini
-from src.constants import PROMPT_TEMPLATES
 os.makedirs('logs', exist_ok=True)
 
 logging.basicConfig(
@@ -19,12 +17,13 @@ logging.basicConfig(
 
 if __name__ == "__main__":
     load_dotenv()
-    ingestion = run_ingestion()
+    configure_metrics()
+    service = get_query_service()
+    service.ingest()
     querey = input("Enter your query: ")
-    doc = ingestion.similarity_search(querey)
-    formated_doc = format_documents(doc)
-    prompt = PROMPT_TEMPLATES["podcast_summary"].format(context=formated_doc)
-    print(run_gemini(prompt))
+    for part in service.ask_stream(querey, use_case="podcast_summary"):
+        print(part, end="", flush=True)
+    print()
 
  
 
@@ -1,21 +1,49 @@
-from src.constants import DATA_DIR_NAME, YOUTUBE_DATA_DIR_NAME, ARTICLE_DATA_DIR_NAME
+from src.constants import (
+    ARTICLE_DATA_DIR_NAME,
+    COLLECTION_NAME,
+    DATA_DIR_NAME,
+    KNOWLEDGE_BASES_DIR,
+    PDF_DATA_DIR_NAME,
+    YOUTUBE_DATA_DIR_NAME,
+)
 import os 
+import re
+
+# Collection names end up in file paths (data directory, manifest, BM25 index).
+COLLECTION_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+
+
+def check_collection_name(collection_name):
+    """Raise ValueError unless `collection_name` is safe to use as a knowledge base name."""
+    if not isinstance(collection_name, str) or not COLLECTION_NAME_RE.fullmatch(collection_name):
+        raise ValueError(f"Invalid knowledge base name {collection_name!r}; use letters, digits, '_' and '-'")
+    return collection_name
+
 
 class ConfigManager:
-    def __init__(self):
-        self.data_dir = DATA_DIR_NAME
+    def __init__(self, collection_name=COLLECTION_NAME):
+        check_collection_name(collection_name)
+        # Each knowledge base (collection) ingests its own directory tree.
+        self.data_dir = DATA_DIR_NAME if collection_name == COLLECTION_NAME else \
+            os.path.join(KNOWLEDGE_BASES_DIR, collection_name)
         self.youtube_data_dir = YOUTUBE_DATA_DIR_NAME
         self.article_data_dir = ARTICLE_DATA_DIR_NAME
+        self.pdf_data_dir = PDF_DATA_DIR_NAME
 
 class YoutubeConfig(ConfigManager):
-    def __init__(self):
-        self.config_manager = ConfigManager()
+    def __init__(self, collection_name=COLLECTION_NAME):
+        self.config_manager = ConfigManager(collection_name)
         self.data_dir = os.path.join(self.config_manager.data_dir, self.config_manager.youtube_data_dir)
          
 class ArticleConfig(ConfigManager):
-    def __init__(self):
-        self.config_manager = ConfigManager()
+    def __init__(self, collection_name=COLLECTION_NAME):
+        self.config_manager = ConfigManager(collection_name)
         self.data_dir = os.path.join(self.config_manager.data_dir, self.config_manager.article_data_dir)
 
+class PdfConfig(ConfigManager):
+    def __init__(self, collection_name=COLLECTION_NAME):
+        self.config_manager = ConfigManager(collection_name)
+        self.data_dir = os.path.join(self.config_manager.data_dir, self.config_manager.pdf_data_dir)
+
 
 
@@ -1,18 +1,120 @@
+import os
+
 MODEL_NAME = "gemini-1.5-flash"
 DATA_DIR_NAME = "data/"
 YOUTUBE_DATA_DIR_NAME = "youtube_data"
 ARTICLE_DATA_DIR_NAME = "article_data"
+PDF_DATA_DIR_NAME = "pdf_data"
+CACHE_DIR_NAME = ".cache/"
+MANIFEST_FILE_NAME = "ingestion_manifest.json"
 
+# "server" (QDRANT_HOST:QDRANT_PORT), "local" (embedded, persisted under
+# QDRANT_LOCAL_PATH) or "memory" (embedded, process lifetime only).
+QDRANT_BACKEND = os.getenv("QDRANT_BACKEND", "server")
 QDRANT_HOST = "localhost"
 QDRANT_PORT = 6333
+QDRANT_LOCAL_PATH = ".cache/qdrant"
 HOST_PORT = 6334
 COLLECTION_NAME = "rag_docs"
+# Named knowledge bases (per team, per show) are collections of their own, with
+# their own manifest and BM25 index; their extracted text lives under
+# KNOWLEDGE_BASES_DIR/<name>/ while the default collection keeps data/.
+KNOWLEDGE_BASES_DIR = "knowledge_bases/"
+QUERY_FANOUT_WORKERS = 8  # collections searched in parallel for one query
+# Collection layout, applied when a collection is created (reset it to change).
+# Quantization: None (float32 only), "int8" (scalar, 4x smaller) or "binary"
+# (32x smaller). Quantized vectors stay in RAM and, with rescoring, the top
+# k * QDRANT_OVERSAMPLING candidates are re-ranked with the original vectors,
+# which can then live on disk. Embedded backends store the settings but always
+# search exactly, so they only take effect on a Qdrant server.
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION") or None
+QDRANT_RESCORE = True
+QDRANT_OVERSAMPLING = 2.0
+QDRANT_ON_DISK_VECTORS = os.getenv("QDRANT_ON_DISK_VECTORS", "0") == "1"
+QDRANT_ON_DISK_PAYLOAD = os.getenv("QDRANT_ON_DISK_PAYLOAD", "0") == "1"
+# HNSW graph: links per node and build-time beam width; QDRANT_HNSW_EF is the
+# search-time beam width (None keeps Qdrant's default). Higher is better recall,
+# slower build/search and, for m, more memory.
+QDRANT_HNSW_M = 16
+QDRANT_HNSW_EF_CONSTRUCT = 100
+QDRANT_HNSW_EF = None
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+# "torch", "onnx" or "onnx-int8" (ONNX Runtime, dynamically quantized weights),
+# or "hash" for model-free stand-in vectors (benchmarks and offline runs).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_THREADS = None  # None keeps the library default (all cores)
 CHUNK_SIZE = 384
 CHUNK_OVERLAP = 20
+# MiniLM reads at most 256 tokens including [CLS]/[SEP] and truncates the rest,
+# so ingestion chunks are measured in the embedding model's own tokens.
+EMBEDDING_MAX_TOKENS = 256
+CHUNK_TOKENS = 128
+CHUNK_OVERLAP_TOKENS = 16
+# Transcripts are chunked on caption boundaries; a chunk also ends once it
+# spans this many seconds of video, so its timestamp stays a precise citation.
+TRANSCRIPT_WINDOW_SECONDS = 60
+# "dense", "sparse" (BM25) or "hybrid" (reciprocal-rank fusion of both).
+RETRIEVAL_MODE = "hybrid"
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+HYBRID_FETCH_FACTOR = 4  # each retriever contributes k * factor candidates to fusion
+# Over-fetch RERANK_CANDIDATES, rerank them with a CPU cross-encoder within
+# RERANK_BUDGET_MS, then keep k diverse chunks via MMR.
+RERANK_ENABLED = True
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 20
+RERANK_BATCH_SIZE = 8
+RERANK_BUDGET_MS = 300
+MMR_LAMBDA = 0.7
+# HTTP query server (src/server.py): in-flight request limit, queue depth
+# before shedding load with 503, and query embedding micro-batching.
+SERVER_MAX_CONCURRENCY = 32
+SERVER_MAX_PENDING = 256
+SERVER_MAX_BATCH = 32
+SERVER_BATCH_WAIT_MS = 5
+INGEST_BATCH_SIZE = 256  # keep a multiple of EMBEDDING_BATCH_SIZE
+# Ingestion runs as concurrent stages joined by queues of INGEST_QUEUE_SIZE
+# items; worker threads per stage (the dedup/batching stage always has one).
+INGEST_STAGE_WORKERS = {"load": 2, "chunk": 2, "embed": 1, "upsert": 2}
+INGEST_QUEUE_SIZE = 8
+
+# Extracted PDFs are stored one page per form feed so page numbers survive to ingestion.
+PDF_PAGE_SEPARATOR = "\f"
+PDF_PAGES_PER_TASK = 50
+# Article fetching: one pooled session per process, responses cached under
+# CACHE_DIR_NAME/http and revalidated with ETag / Last-Modified.
+HTTP_POOL_SIZE = 16  # connections kept per host; at least BulkIngestor's workers
+HTTP_TIMEOUT_SECONDS = 10
+HTTP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+# HTML-to-text engine for articles: "lxml" (single streaming pass), "bs4"
+# (BeautifulSoup's html.parser) or "auto" (lxml when installed, else bs4).
+HTML_ENGINE = "auto"
 
 GEMINI_MODEL_NAME = "gemini-2.0-flash"
-
+# "gemini", or "stub" for a local canned model (no API key or network needed).
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+
+RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+RESPONSE_CACHE_MAX_ENTRIES = 5000
+# Cosine similarity above which a different query reuses a cached answer; None disables.
+RESPONSE_CACHE_SIMILARITY = 0.97
+
+# Comma-separated metric exporters: "json" writes a JSON log line per timed
+# span, "prometheus" serves the registry at http://0.0.0.0:METRICS_PORT/metrics.
+METRICS_EXPORTERS = os.getenv("METRICS_EXPORTERS", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+# Directory for cProfile dumps of ingestion runs and queries; unset disables profiling.
+PROFILE_DIR = os.getenv("PROFILE_DIR") or None
+
+# Upper bound on retrieved context per prompt template, in estimated LLM tokens.
+DEFAULT_CONTEXT_TOKEN_BUDGET = 1500
+PROMPT_TOKEN_BUDGETS = {
+    "podcast_summary": 2000,
+    "science_explainer": 1500,
+    "code_analysis": 2500,
+}
 
 PROMPT_TEMPLATES = {
     "podcast_summary": """
@@ -24,6 +126,7 @@ Summarize the transcript chunks below with:
 - 🎯 Actionable or memorable takeaways
 - 🧑‍🤝‍🧑 Speaker names and their positions (if available)
 - 📝 Keep it crisp, insightful, and engaging
+- ⏱️ Cite the [m:ss] timestamp of the chunk a point comes from, when one is given
 
 --- TRANSCRIPT CHUNKS ---
 {context}
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List
+from src.constants import CHUNK_OVERLAP_TOKENS, DEFAULT_CONTEXT_TOKEN_BUDGET, PROMPT_TOKEN_BUDGETS
+
+WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    """Rough LLM token count (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+def simhash(text, shingle=3):
+    """64-bit SimHash over word shingles; near-identical texts differ in few bits."""
+    words = WORD_RE.findall(text.lower())
+    shingles = [" ".join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))]
+    weights = [0] * 64
+    for item in shingles:
+        h = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _overlap(left, right, min_chars, max_chars):
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    for size in range(min(max_chars, len(left), len(right)), min_chars - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+@dataclass
+class BuiltContext:
+    text: str
+    tokens: int
+    budget: int
+    chunks: int
+    merged: int = 0
+    near_duplicates: int = 0
+    dropped_for_budget: int = 0
+    sources: List[dict] = field(default_factory=list)
+
+
+class ContextBuilder:
+    """Packs retrieved chunks into a prompt context under a token budget.
+
+    Chunks are expected best-first. Consecutive chunks of the same source whose
+    text overlaps (the region the chunker duplicates) are merged
+    into one passage, near-duplicates are dropped by SimHash distance, and the
+    remaining passages are taken in rank order while they fit the budget.
+    """
+
+    # On chunk-sized text a one- or two-word edit flips ~4-12 of 64 bits, while
+    # unrelated chunks sit around 32 (rarely below 16). Chunk overlaps are
+    # CHUNK_OVERLAP_TOKENS model tokens, rarely over 8 characters each.
+    def __init__(self, count_tokens=estimate_tokens, max_hamming=10,
+                 min_overlap=8, max_overlap=CHUNK_OVERLAP_TOKENS * 8):
+        self.count_tokens = count_tokens
+        self.max_hamming = max_hamming
+        self.min_overlap = min_overlap
+        self.max_overlap = max_overlap
+
+    def _merge_overlapping(self, docs):
+        # passages: [text, rank, metadata]; a chunk joins an earlier passage of
+        # the same source when one's tail overlaps the other's head.
+        passages = []
+        merged = 0
+        for rank, doc in enumerate(docs):
+            text = doc.page_content.strip()
+            source = doc.metadata.get("source")
+            for passage in passages:
+                if passage[2].get("source") != source:
+                    continue
+                size = _overlap(passage[0], text, self.min_overlap, self.max_overlap)
+                if size:
+                    passage[0] += text[size:]
+                    if "end_time" in doc.metadata:
+                        passage[2]["end_time"] = doc.metadata["end_time"]
+                    merged += 1
+                    break
+                size = _overlap(text, passage[0], self.min_overlap, self.max_overlap)
+                if size:
+                    passage[0] = text + passage[0][size:]
+                    # The passage now starts where this chunk does.
+                    for key in ("start_time", "timestamp"):
+                        if key in doc.metadata:
+                            passage[2][key] = doc.metadata[key]
+                    merged += 1
+                    break
+            else:
+                passages.append([text, rank, dict(doc.metadata)])
+        return passages, merged
+
+    def build(self, docs, budget=DEFAULT_CONTEXT_TOKEN_BUDGET):
+        passages, merged = self._merge_overlapping(docs)
+        fingerprints = []
+        parts = []
+        sources = []
+        tokens = near_duplicates = dropped = 0
+        for text, _, metadata in sorted(passages, key=lambda passage: passage[1]):
+            fingerprint = simhash(text)
+            if any(hamming(fingerprint, seen) <= self.max_hamming for seen in fingerprints):
+                near_duplicates += 1
+                continue
+            cost = self.count_tokens(text)
+            if tokens + cost > budget:
+                dropped += 1
+                continue
+            fingerprints.append(fingerprint)
+            # Transcript passages carry their position in the video, so
+            # answers can cite it.
+            timestamp = metadata.get("timestamp")
+            parts.append(f"\n[{timestamp}] {text}" if timestamp else f"\n{text}")
+            sources.append(metadata)
+            tokens += cost
+
+        context = BuiltContext(
+            text="\n".join(parts),
+            tokens=tokens,
+            budget=budget,
+            chunks=len(parts),
+            merged=merged,
+            near_duplicates=near_duplicates,
+            dropped_for_budget=dropped,
+            sources=sources,
+        )
+        logging.info(
+            f"Context: {context.tokens}/{budget} tokens from {context.chunks} passages "
+            f"({merged} merged, {near_duplicates} near-duplicates, {dropped} over budget)"
+        )
+        return context
+
+
+def build_context(docs, use_case):
+    """Context for a PROMPT_TEMPLATES use case, within that template's token budget."""
+    budget = PROMPT_TOKEN_BUDGETS.get(use_case, DEFAULT_CONTEXT_TOKEN_BUDGET)
+    return ContextBuilder().build(docs, budget=budget)
@@ -1,14 +1,25 @@
+import json
 import logging
-import pdfplumber 
 import os 
 from abc import ABC, abstractmethod
-import requests
-from bs4 import BeautifulSoup 
 import re
-from youtube_transcript_api import YouTubeTranscriptApi
-from typing import Optional
-from src.config import YoutubeConfig, ArticleConfig
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from src.constants import CACHE_DIR_NAME, COLLECTION_NAME, PDF_PAGE_SEPARATOR, PDF_PAGES_PER_TASK
+from src.config import YoutubeConfig, ArticleConfig, PdfConfig, check_collection_name
+from src.html_extraction import SoupEngine, get_html_engine
+from src.http_cache import HTTPCache
+from src.metrics import metrics
+from src.utils import hash_text, transcript_timings_path, write_source_metadata, write_transcript_timings
 from datetime import datetime
+
+# pdfplumber and the transcript API are imported in the methods that use them
+# (requests in src.http_cache, HTML parsers in src.html_extraction): each
+# extractor needs only its own, and the app and CLI should not pay for all of
+# them at startup.
  
 class KnowledgeBase(ABC):
     """Abstract base class for all data extraction implementations."""
@@ -59,19 +70,60 @@ class KnowledgeBase(ABC):
             self.save_data(data, output_path)
         return data
 
+def _extract_page_range(source_path: str, start: int, end: int):
+    # Module-level so it can be shipped to worker processes.
+    return list(PDFExtractor().iter_pages(source_path, start, end))
+
 class PDFExtractor(KnowledgeBase):
-    """Extract text content from PDF files."""
+    """Extract text content from PDF files, one page at a time."""
     name = "pdf"
-    
+
+    def __init__(self, workers: Optional[int] = None, pages_per_task: int = PDF_PAGES_PER_TASK):
+        """
+        Args:
+            workers: Worker processes for large PDFs; None parses in-process
+            pages_per_task: Pages handed to a worker per task
+        """
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+
+    def iter_pages(self, source_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for pages[start:end], numbered from 1."""
+        import pdfplumber
+        with pdfplumber.open(source_path) as pdf:
+            for number, page in enumerate(pdf.pages[start:end], start=start + 1):
+                text = page.extract_text() or ""
+                # pdfplumber caches parsed layout objects per page; drop them so
+                # memory stays flat regardless of page count.
+                page.flush_cache()
+                yield number, text
+
+    def iter_pages_parallel(self, source_path: str) -> Iterator[Tuple[int, str]]:
+        """Like `iter_pages`, but fans page ranges out to worker processes.
+
+        Pages are still yielded in order, and only a bounded number of ranges
+        are in flight at once.
+        """
+        import pdfplumber
+        with pdfplumber.open(source_path) as pdf:
+            page_count = len(pdf.pages)
+        if not self.workers or page_count <= self.pages_per_task:
+            yield from self.iter_pages(source_path)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for start in range(0, page_count, self.pages_per_task):
+                end = min(start + self.pages_per_task, page_count)
+                pending.append(pool.submit(_extract_page_range, source_path, start, end))
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
     def extract_data(self, source_path: str) -> str:
         try:
-            with pdfplumber.open(source_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    extracted = page.extract_text()
-                    if extracted:
-                        text += extracted
-                return text
+            return PDF_PAGE_SEPARATOR.join(text for _, text in self.iter_pages_parallel(source_path))
         except FileNotFoundError as e:
             logging.error(f"PDF file not found: {source_path}. Error: {e}")
             return ""
@@ -79,10 +131,49 @@ class PDFExtractor(KnowledgeBase):
             logging.error(f"Error extracting data from PDF: {e}")
             return ""
 
+    def process_source(self, source_path: str, output_path: str) -> str:
+        """Stream pages straight to `output_path`, separated by PDF_PAGE_SEPARATOR.
+
+        Unlike the other extractors the full text is never held in memory, so
+        this returns `output_path` on success (and "" on failure) rather than
+        the content itself.
+        """
+        try:
+            with open(output_path, 'w', encoding='utf-8') as file:
+                for number, text in self.iter_pages_parallel(source_path):
+                    if number > 1:
+                        file.write(PDF_PAGE_SEPARATOR)
+                    file.write(text)
+            return output_path
+        except FileNotFoundError as e:
+            logging.error(f"PDF file not found: {source_path}. Error: {e}")
+        except Exception as e:
+            logging.error(f"Error extracting data from PDF: {e}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return ""
+
 class ArticleExtractor(KnowledgeBase):
-    """Extract content from web articles."""
+    """Extract content from web articles.
+
+    Pages are fetched through a shared, connection-pooled session and an
+    on-disk HTTP cache (see `HTTPCache`), so re-extracting an unchanged page
+    costs a 304, and turned into text by a pluggable engine (see
+    `src.html_extraction`). The whole article is kept; `process_source`
+    writes it one paragraph at a time and ingestion chunks the file as a
+    stream.
+    """
     name = "article"
-    
+
+    def __init__(self, cache: Optional[HTTPCache] = None, engine=None):
+        """
+        Args:
+            cache: HTTP cache to fetch through (default: CACHE_DIR_NAME/http)
+            engine: HTML-to-text engine (default: `get_html_engine()`, per HTML_ENGINE)
+        """
+        self.cache = cache or HTTPCache()
+        self.engine = engine or get_html_engine()
+
     def extract_data(self, source_path: str) -> str:
         """Extract text from a web article.
         
@@ -90,51 +181,67 @@ class ArticleExtractor(KnowledgeBase):
             source_path: URL of the article
             
         Returns:
-            Extracted article text
+            Extracted article text, one paragraph per line
         """
-        return self._fetch_text_from_web(source_path)
-    
-    def _fetch_text_from_web(self, url: str) -> str:
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-                element.decompose()
-
-            if 'wikipedia.org' in url:
-                for element in soup.find_all(class_=['reflist', 'navbox', 'mw-editsection']):
-                    element.decompose()
-                # Remove specific sections
-                for section in soup.find_all(['h2', 'h3']):
-                    if section.text.lower() in ['references', 'external links', 'see also', 'further reading']:
-                        next_sibling = section.find_next_sibling()
-                        while next_sibling and next_sibling.name not in ['h2', 'h3']:
-                            next_sibling.decompose()
-                            next_sibling = section.find_next_sibling()
-
-            # Extract text from relevant elements
-            elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'li'])
-            text_parts = []
-            for element in elements:
-                text = element.get_text(strip=True)
-                if text and len(text) > 20:  # Ignore very short snippets
-                    text_parts.append(text)
-
-            text = ' '.join(text_parts)
-            text = re.sub(r'\s+', ' ', text).strip()   
-            return text[:10000] if text else "No content extracted"
+            text = "\n".join(self.iter_paragraphs(source_path))
+            return text if text else "No content extracted"
         except Exception as e:
             logging.error(f"Error extracting article: {str(e)}")
             return f"Error extracting article: {str(e)}"
 
+    def process_source(self, source_path: str, output_path: str) -> str:
+        """Stream paragraphs straight to `output_path`.
+
+        Like `PDFExtractor.process_source`, returns `output_path` on success
+        rather than the content, or an error message (and no file) on failure.
+        """
+        try:
+            written = 0
+            with open(output_path, 'w', encoding='utf-8') as file:
+                for paragraph in self.iter_paragraphs(source_path):
+                    if written:
+                        file.write("\n")
+                    file.write(paragraph)
+                    written += 1
+            if written:
+                return output_path
+            message = "No content extracted"
+        except Exception as e:
+            logging.error(f"Error extracting article: {str(e)}")
+            message = f"Error extracting article: {str(e)}"
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return message
+
+    def iter_paragraphs(self, url: str) -> Iterator[str]:
+        """Yield the article's text blocks (paragraphs, headings, list items) in order."""
+        response = self.cache.fetch(url)
+        produced = False
+        try:
+            with open(response.path, "rb") as body:
+                for text in self.engine.iter_text(body, response.encoding, url):
+                    produced = True
+                    yield text
+        except Exception as e:
+            # A page the fast engine cannot parse gets the forgiving one,
+            # unless part of it has already been handed out.
+            if produced or isinstance(self.engine, SoupEngine):
+                raise
+            logging.warning(f"{self.engine.name} could not extract {url} ({e}); retrying with BeautifulSoup")
+            with open(response.path, "rb") as body:
+                yield from SoupEngine().iter_text(body, response.encoding, url)
+
 class YouTubeExtractor(KnowledgeBase):
-    """Extract transcript from YouTube videos."""
+    """Extract transcripts from YouTube videos, keeping caption timings.
+
+    Transcripts are cached under `cache_dir` by video ID, so extracting the
+    same video again makes no network call.
+    """
     name = "youtube"
+
+    def __init__(self, cache_dir: str = os.path.join(CACHE_DIR_NAME, "transcripts")):
+        self.cache_dir = cache_dir
     
     def extract_data(self, source_path: str) -> str:
         """Extract transcript from a YouTube video.
@@ -147,6 +254,32 @@ class YouTubeExtractor(KnowledgeBase):
         """
         return self._fetch_text_from_youtube(source_path)
 
+    def process_source(self, source_path: str, output_path: str) -> str:
+        """Write one caption per line to `output_path`, with their timings in a sidecar.
+
+        Ingestion uses the timings (see `write_transcript_timings`) to chunk on
+        caption boundaries and stamp chunks with their position in the video.
+        Returns `output_path` on success, or an error message (and no file).
+        """
+        try:
+            segments = list(self._clean_segments(self.fetch_segments(source_path)))
+            if segments:
+                with open(output_path, 'w', encoding='utf-8') as file:
+                    file.write("\n".join(text for text, _, _ in segments))
+                write_transcript_timings(output_path, [[start, duration] for _, start, duration in segments])
+                return output_path
+            message = "No transcript available"
+        except ValueError as e:
+            logging.error(f"URL validation error: {str(e)}")
+            message = f"URL validation error: {str(e)}"
+        except Exception as e:
+            logging.error(f"Error extracting YouTube transcript: {str(e)}")
+            message = f"Error extracting YouTube transcript: {str(e)}"
+        for path in (output_path, transcript_timings_path(output_path)):
+            if os.path.exists(path):
+                os.remove(path)
+        return message
+
     def _extract_video_id(self, url: str) -> str:
         patterns = [
             r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
@@ -158,25 +291,50 @@ class YouTubeExtractor(KnowledgeBase):
                 return match.group(1)
         raise ValueError("Could not extract video ID from URL")
 
-    def _fetch_text_from_youtube(self, url: str) -> str:
+    def fetch_segments(self, url: str) -> List[dict]:
+        """Caption segments ({"text", "start", "duration"}) of the video at `url`.
+
+        Raises ValueError if `url` is not a YouTube video URL.
+        """
+        if not any(domain in url.lower() for domain in ['youtube.com', 'youtu.be']):
+            raise ValueError("Invalid YouTube URL")
+        video_id = self._extract_video_id(url)
+        cache_path = os.path.join(self.cache_dir, f"{video_id}.json")
         try:
-            if not any(domain in url.lower() for domain in ['youtube.com', 'youtu.be']):
-                raise ValueError("Invalid YouTube URL")
+            with open(cache_path, "r", encoding="utf-8") as f:
+                segments = json.load(f)
+            metrics.inc("transcript_cache_requests_total", result="hit")
+            return segments
+        except (OSError, ValueError):
+            pass
 
-            video_id = self._extract_video_id(url)
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            
-            # Process and clean the transcript
-            text_parts = []
-            for segment in transcript_list:
-                text = segment.get('text', '').strip()
-                if text:
-                    text_parts.append(text)
-
-            cleaned_text = ' '.join(text_parts)
-            # Remove multiple spaces and normalize whitespace
-            cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-            
+        from youtube_transcript_api import YouTubeTranscriptApi
+        segments = [
+            {
+                "text": segment.get('text', ''),
+                "start": float(segment.get('start', 0.0)),
+                "duration": float(segment.get('duration', 0.0)),
+            }
+            for segment in YouTubeTranscriptApi.get_transcript(video_id)
+        ]
+        metrics.inc("transcript_cache_requests_total", result="miss")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(segments, f)
+        os.replace(tmp_path, cache_path)
+        return segments
+
+    def _clean_segments(self, segments) -> Iterator[Tuple[str, float, float]]:
+        """(text, start, duration) per non-empty caption, whitespace normalized."""
+        for segment in segments:
+            text = re.sub(r'\s+', ' ', segment.get('text', '')).strip()
+            if text:
+                yield text, segment['start'], segment['duration']
+
+    def _fetch_text_from_youtube(self, url: str) -> str:
+        try:
+            cleaned_text = ' '.join(text for text, _, _ in self._clean_segments(self.fetch_segments(url)))
             return cleaned_text if cleaned_text else "No transcript available"
 
         except ValueError as e:
@@ -186,25 +344,59 @@ class YouTubeExtractor(KnowledgeBase):
             logging.error(f"Error extracting YouTube transcript: {str(e)}")
             return f"Error extracting YouTube transcript: {str(e)}"
 
+ERROR_PREFIXES = (
+    "Error extracting",
+    "URL validation error",
+    "No content extracted",
+    "No transcript available",
+)
+
+def is_extraction_error(content: str) -> bool:
+    """Extractors report failures as text; tell those apart from real content."""
+    return not content or content.startswith(ERROR_PREFIXES)
+
 class ContentExtractor:
     """Factory class to work with different extractor types."""
     
-    def __init__(self, extractor: KnowledgeBase):
+    def __init__(self, extractor: KnowledgeBase, collection_name: str = COLLECTION_NAME):
         self.extractor = extractor 
+        # Knowledge base the extracted text is written for (see ConfigManager);
+        # checked here, before anything is fetched or written.
+        self.collection_name = check_collection_name(collection_name)
     
     def extract_data(self, source_path: str) -> str:
         return self.extractor.extract_data(source_path)
     
-    def process_source(self, source_path: str) -> str:
-        if self.extractor.name == "youtube":
-            os.makedirs(YoutubeConfig().data_dir, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = os.path.join(YoutubeConfig().data_dir, f"youtube_{timestamp}.txt")
-        elif self.extractor.name == "article":
-            os.makedirs(ArticleConfig().data_dir, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = os.path.join(ArticleConfig().data_dir, f"article_{timestamp}.txt")
-        return self.extractor.process_source(source_path, output_path)
+    def process_source(self, source_path: str, source_name: Optional[str] = None) -> str:
+        """Extract `source_path` into the extractor's data directory.
+
+        Alongside the `.txt` file a `.meta.json` sidecar records where the text
+        came from; ingestion copies it into every chunk's payload.
+
+        Args:
+            source_path: Path or URL to the source
+            source_name: Name to record instead of `source_path` (e.g. the
+                original file name of an upload saved to a temporary path)
+        """
+        data_dir = {
+            "youtube": YoutubeConfig,
+            "article": ArticleConfig,
+            "pdf": PdfConfig,
+        }[self.extractor.name](self.collection_name).data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        # Microseconds keep names unique when several sources finish in the same second.
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        output_path = os.path.join(data_dir, f"{self.extractor.name}_{timestamp}.txt")
+        result = self.extractor.process_source(source_path, output_path)
+        if result and not is_extraction_error(result) and os.path.exists(output_path):
+            source = source_name or source_path
+            write_source_metadata(output_path, {
+                "source": source,
+                "extractor": self.extractor.name,
+                "document_id": hash_text(source),
+                "extracted_at": time.time(),
+            })
+        return result
 
 if __name__ == "__main__":
     # Configure logging
@@ -0,0 +1,160 @@
+import logging
+import re
+from typing import Iterator, Optional
+from src.constants import HTML_ENGINE
+
+# Elements dropped with everything inside them.
+BOILERPLATE_TAGS = ("script", "style", "nav", "footer", "header", "aside")
+# Elements whose text becomes a paragraph of the article.
+TEXT_TAGS = ("p", "h1", "h2", "h3", "li")
+SECTION_TAGS = ("h2", "h3")
+# Wikipedia only: chrome by class, and sections dropped up to the next heading.
+WIKIPEDIA_SKIP_CLASSES = frozenset(("reflist", "navbox", "mw-editsection"))
+WIKIPEDIA_SKIP_SECTIONS = ("references", "external links", "see also", "further reading")
+MIN_TEXT_CHARS = 20  # shorter snippets are menus, captions and the like
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class SoupEngine:
+    """BeautifulSoup with the pure-Python `html.parser`; always available.
+
+    Parses the whole page, removes boilerplate, then collects text elements.
+    """
+    name = "bs4"
+
+    def iter_text(self, body, encoding: Optional[str] = None, url: str = "") -> Iterator[str]:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(body, "html.parser", from_encoding=encoding)
+        for element in soup(list(BOILERPLATE_TAGS)):
+            element.decompose()
+
+        if "wikipedia.org" in url:
+            for element in soup.find_all(class_=list(WIKIPEDIA_SKIP_CLASSES)):
+                element.decompose()
+            for section in soup.find_all(list(SECTION_TAGS)):
+                if normalize_text(section.get_text()).lower() not in WIKIPEDIA_SKIP_SECTIONS:
+                    continue
+                # Walk the siblings once; re-running find_next_sibling() after
+                # each decompose rescans the text nodes left behind (O(n^2)).
+                sibling = section.next_sibling
+                while sibling is not None:
+                    following = sibling.next_sibling
+                    if sibling.name in SECTION_TAGS:
+                        break
+                    if sibling.name is not None:
+                        sibling.decompose()
+                    sibling = following
+
+        for element in soup.find_all(list(TEXT_TAGS)):
+            text = normalize_text(element.get_text())
+            if len(text) > MIN_TEXT_CHARS:
+                yield text
+
+
+class _Frame:
+    __slots__ = ("skipped", "skip_section", "slot")
+
+    def __init__(self, skipped):
+        self.skipped = skipped
+        # Set on a parent once a skipped Wikipedia heading closes: its later
+        # children are dropped until the next heading.
+        self.skip_section = False
+        self.slot = None
+
+
+class LxmlEngine:
+    """Single streaming pass over libxml2's HTML parser (needs `lxml`).
+
+    Boilerplate and skipped sections are recognized as their start tags
+    arrive and never contribute text; each text element is emitted when it
+    closes and the finished part of the tree is freed, so memory stays flat
+    on long pages. Output matches `SoupEngine`, in document order.
+    """
+    name = "lxml"
+    _SKIP_ATTR = "data-rag-skip"
+
+    def _text(self, element):
+        parts = [element.text or ""]
+        for child in element:
+            if isinstance(child.tag, str) and child.get(self._SKIP_ATTR) is None:
+                parts.append(self._text(child))
+            parts.append(child.tail or "")
+        return "".join(parts)
+
+    def iter_text(self, body, encoding: Optional[str] = None, url: str = "") -> Iterator[str]:
+        from lxml import etree
+
+        wikipedia = "wikipedia.org" in url
+        frames = []
+        # Text of nested text elements (an <li> holding a <p>) is collected
+        # until the outermost one closes, then emitted in start-tag order.
+        pending = []
+        open_text = 0
+        events = etree.iterparse(
+            body, events=("start", "end"), html=True, encoding=encoding, remove_comments=True, remove_pis=True
+        )
+        for event, element in events:
+            tag = element.tag if isinstance(element.tag, str) else ""
+            if event == "start":
+                parent = frames[-1] if frames else None
+                skipped = parent is not None and parent.skipped
+                if not skipped and parent is not None and parent.skip_section:
+                    if tag in SECTION_TAGS:
+                        parent.skip_section = False
+                    else:
+                        skipped = True
+                if not skipped and (tag in BOILERPLATE_TAGS or (
+                        wikipedia and not WIKIPEDIA_SKIP_CLASSES.isdisjoint((element.get("class") or "").split()))):
+                    skipped = True
+                frame = _Frame(skipped)
+                frames.append(frame)
+                if skipped:
+                    element.set(self._SKIP_ATTR, "")
+                elif tag in TEXT_TAGS:
+                    frame.slot = len(pending)
+                    pending.append("")
+                    open_text += 1
+                continue
+
+            frame = frames.pop()
+            if not frame.skipped:
+                if wikipedia and tag in SECTION_TAGS and frames:
+                    if normalize_text(self._text(element)).lower() in WIKIPEDIA_SKIP_SECTIONS:
+                        frames[-1].skip_section = True
+                if frame.slot is not None:
+                    pending[frame.slot] = normalize_text(self._text(element))
+                    open_text -= 1
+            if open_text == 0:
+                for text in pending:
+                    if len(text) > MIN_TEXT_CHARS:
+                        yield text
+                pending.clear()
+                # Nothing before this point is needed again.
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+
+
+HTML_ENGINES = {
+    "lxml": LxmlEngine,
+    "bs4": SoupEngine,
+}
+
+
+def get_html_engine(name=HTML_ENGINE):
+    """The configured engine; "auto" picks lxml when it is installed."""
+    if name == "auto":
+        try:
+            import lxml  # noqa: F401
+            name = "lxml"
+        except ImportError:
+            logging.info("lxml is not installed; extracting HTML with BeautifulSoup")
+            name = "bs4"
+    if name not in HTML_ENGINES:
+        raise ValueError(f"Unknown HTML engine {name!r}; expected 'auto' or one of {tuple(HTML_ENGINES)}")
+    return HTML_ENGINES[name]()
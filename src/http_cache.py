@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from src.constants import CACHE_DIR_NAME, HTTP_POOL_SIZE, HTTP_TIMEOUT_SECONDS, HTTP_USER_AGENT
+from src.metrics import metrics
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(pool_size=HTTP_POOL_SIZE):
+    """Process-wide `requests.Session`, so fetches from one host reuse pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            # Retries are left to callers (BulkIngestor backs off per source).
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = HTTP_USER_AGENT
+            _session = session
+    return _session
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    # Raw response body on disk; read or stream it from here.
+    path: str
+    # Charset declared in Content-Type, if any; otherwise let the parser sniff it.
+    encoding: Optional[str]
+    # True when the server answered 304 and the body came from the cache.
+    from_cache: bool
+
+
+class HTTPCache:
+    """On-disk cache of GET responses, revalidated with ETag / Last-Modified.
+
+    Each URL maps to `<md5>.body` (the body exactly as received, streamed to
+    disk) and `<md5>.json` (validators and charset). A URL already in the cache
+    is requested with If-None-Match / If-Modified-Since, so an unchanged page
+    costs a 304 and no download. Responses carrying neither validator are
+    still written to disk for the caller but always fetched again.
+    """
+
+    def __init__(self, cache_dir=os.path.join(CACHE_DIR_NAME, "http"), session=None,
+                 timeout=HTTP_TIMEOUT_SECONDS, chunk_size=1 << 16):
+        self.cache_dir = cache_dir
+        self._session = session
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = get_session()
+        return self._session
+
+    def _paths(self, url):
+        key = hashlib.md5(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.body"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_meta(self, meta_path, body_path):
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fetch(self, url) -> CachedResponse:
+        """GET `url`, answering from the cache when the server confirms it is unchanged.
+
+        Raises `requests.RequestException` (including HTTP errors) on failure.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+        meta = self._load_meta(meta_path, body_path)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and meta:
+                metrics.inc("http_cache_requests_total", result="revalidated")
+                logging.info(f"Not modified, using cached copy of {url}")
+                return CachedResponse(url, body_path, meta.get("encoding"), True)
+            response.raise_for_status()
+
+            # Unique per thread so concurrent fetches of one URL do not interleave.
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                for block in response.iter_content(self.chunk_size):
+                    f.write(block)
+            os.replace(tmp_path, body_path)
+
+            declared = "charset=" in response.headers.get("Content-Type", "").lower()
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "encoding": response.encoding if declared else None,
+            }
+        if meta["etag"] or meta["last_modified"]:
+            tmp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+            metrics.inc("http_cache_requests_total", result="miss")
+        else:
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            metrics.inc("http_cache_requests_total", result="uncacheable")
+        return CachedResponse(url, body_path, meta["encoding"], False)
@@ -1,22 +1,101 @@
-from src.pipeline.ingestion_pipeline import run_ingestion
-import google.generativeai as genai 
-from src.constants import PROMPT_TEMPLATES, GEMINI_MODEL_NAME
-from dotenv import load_dotenv
+from src.constants import PROMPT_TEMPLATES, GEMINI_MODEL_NAME, LLM_BACKEND
+import logging
 import os 
+import threading
+import time
+from types import SimpleNamespace
 from  src.utils import format_documents
+from src.metrics import metrics
 from abc import ABC, abstractmethod 
-load_dotenv()
-API_KEY = os.getenv("API_KEY")
-genai.configure(api_key=API_KEY)
 
+_genai = None
+_genai_lock = threading.Lock()
 
-def run_gemini(prompt):
-    model = genai.GenerativeModel(GEMINI_MODEL_NAME)
-    response = model.generate_content(prompt)
+def get_genai():
+    """`google.generativeai`, imported and configured with API_KEY on first use.
+
+    Importing the SDK takes a while and reads the environment, so nothing
+    happens until a Gemini model is actually requested.
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            from dotenv import load_dotenv
+            import google.generativeai as genai
+            load_dotenv()
+            genai.configure(api_key=os.getenv("API_KEY"))
+            _genai = genai
+    return _genai
+
+
+class StubModel:
+    """Stand-in for `genai.GenerativeModel` that answers locally.
+
+    Mirrors the parts of the API we use (`generate_content`, with or without
+    `stream=True`), emitting a few words of the prompt back with a small delay
+    per chunk so streaming and latency metrics can be exercised offline.
+    """
+
+    def __init__(self, model_name="stub", words=40, delay=0.01):
+        self.model_name = model_name
+        self.words = words
+        self.delay = delay
+
+    def _chunks(self, prompt):
+        words = prompt.split()[-self.words:] or ["(empty prompt)"]
+        for i in range(0, len(words), 5):
+            time.sleep(self.delay)
+            yield SimpleNamespace(text=" ".join(words[i:i + 5]) + " ")
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._chunks(prompt)
+        return SimpleNamespace(text="".join(chunk.text for chunk in self._chunks(prompt)))
+
+
+class GenerationTimings:
+    """Filled in by `stream_gemini` as the response arrives."""
+
+    def __init__(self):
+        self.time_to_first_token_ms = None
+        self.total_ms = None
+
+
+def get_model(model_name=GEMINI_MODEL_NAME):
+    if LLM_BACKEND == "stub":
+        return StubModel(model_name)
+    return get_genai().GenerativeModel(model_name)
+
+
+def run_gemini(prompt, model_name=GEMINI_MODEL_NAME):
+    model = get_model(model_name)
+    with metrics.span("llm_request", model=model_name, stream=False):
+        response = model.generate_content(prompt)
     
     return response.text
 
+
+def stream_gemini(prompt, model_name=GEMINI_MODEL_NAME, timings=None):
+    """Yield the response text piece by piece as the model produces it."""
+    timings = timings if timings is not None else GenerationTimings()
+    start = time.perf_counter()
+    for chunk in get_model(model_name).generate_content(prompt, stream=True):
+        if timings.time_to_first_token_ms is None:
+            timings.time_to_first_token_ms = (time.perf_counter() - start) * 1000
+        if chunk.text:
+            yield chunk.text
+    timings.total_ms = (time.perf_counter() - start) * 1000
+    if timings.time_to_first_token_ms is not None:
+        metrics.observe("llm_time_to_first_token_seconds", timings.time_to_first_token_ms / 1000, model=model_name)
+    metrics.observe("llm_request_seconds", timings.total_ms / 1000, model=model_name, stream=True)
+    logging.info(
+        f"LLM {model_name}: first token {timings.time_to_first_token_ms or 0:.0f} ms, "
+        f"total {timings.total_ms:.0f} ms"
+    )
+
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from src.pipeline.ingestion_pipeline import run_ingestion
     load_dotenv()
     ingestion = run_ingestion()
     doc = ingestion.similarity_search("What is the podcast about?")
@@ -31,7 +110,4 @@ if __name__ == "__main__":
 
 
 
-
-
     
-
@@ -0,0 +1,264 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.constants import METRICS_EXPORTERS, METRICS_PORT, PROFILE_DIR
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and latency histograms.
+
+    Everything is keyed by metric name plus labels and kept in memory; the
+    Prometheus endpoint renders the current values, while exporters added
+    with `add_exporter` receive every finished span and explicit `event` as a
+    dict (e.g. to write JSON log lines).
+    """
+
+    def __init__(self, prefix="rag_"):
+        self.prefix = prefix
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.exporters = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1.0, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[len(LATENCY_BUCKETS)] += 1
+            histogram[-1] += seconds
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time a block into the `{name}_seconds` histogram and report it to exporters."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(f"{name}_seconds", seconds, **labels)
+            if error:
+                self.inc(f"{name}_errors_total", **labels)
+            if self.exporters:
+                self.event(name, duration_ms=round(seconds * 1000, 3), error=error, **labels)
+
+    def event(self, name, **fields):
+        """Send a structured record to every exporter."""
+        record = {"ts": time.time(), "event": name, "thread": threading.current_thread().name, **fields}
+        for exporter in list(self.exporters):
+            try:
+                exporter(record)
+            except Exception:
+                logging.exception("Metrics exporter failed")
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def snapshot(self):
+        """Counters, gauges and histogram count/sum as a JSON-friendly dict."""
+        def name_of(name, label_key):
+            return name + _format_labels(label_key)
+
+        with self._lock:
+            return {
+                "counters": {name_of(*key): value for key, value in self.counters.items()},
+                "gauges": {name_of(*key): value for key, value in self.gauges.items()},
+                "histograms": {
+                    name_of(*key): {"count": sum(h[:-1]), "sum": h[-1]} for key, h in self.histograms.items()
+                },
+            }
+
+    def render_prometheus(self):
+        """Current values in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# TYPE {self.prefix}{name} {kind}")
+                    for (series_name, label_key), value in sorted(series.items()):
+                        if series_name == name:
+                            lines.append(f"{self.prefix}{name}{_format_labels(label_key)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                full_name = self.prefix + name
+                lines.append(f"# TYPE {full_name} histogram")
+                for (series_name, label_key), histogram in sorted(self.histograms.items()):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram[:-1]):
+                        cumulative += count
+                        labels = _format_labels(label_key, [("le", str(bound))])
+                        lines.append(f"{full_name}_bucket{labels} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(label_key)} {histogram[-1]}")
+                    lines.append(f"{full_name}_count{_format_labels(label_key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+
+metrics = MetricsRegistry()
+
+
+class JsonLogExporter:
+    """Writes each span/event as one JSON line on the `rag.metrics` logger."""
+
+    def __init__(self, logger_name="rag.metrics"):
+        self.logger = logging.getLogger(logger_name)
+
+    def __call__(self, record):
+        self.logger.info(json.dumps(record, default=str))
+
+
+class _PrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_prometheus(port=METRICS_PORT, host="0.0.0.0"):
+    """Serve the registry at http://host:port/metrics from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _PrometheusHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info(f"Prometheus metrics on http://{host}:{port}/metrics")
+    return server
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+def configure_metrics(exporters=METRICS_EXPORTERS, port=METRICS_PORT):
+    """Enable the exporters named in a comma-separated list ("json", "prometheus"); idempotent."""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+        names = {name.strip() for name in (exporters or "").split(",") if name.strip()}
+        if "json" in names:
+            metrics.add_exporter(JsonLogExporter())
+        if "prometheus" in names:
+            try:
+                serve_prometheus(port)
+            except OSError as e:
+                logging.warning(f"Could not serve Prometheus metrics on port {port}: {e}")
+
+
+# Before Python 3.12 a cProfile profiler sees only the thread that enabled it;
+# from 3.12 there can be one per process and it sees every thread.
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+_profile_state = threading.local()
+_process_profile_lock = threading.Lock()
+
+
+def _claim_profiler():
+    """True if no profiler is running yet in this thread (process, on 3.12+)."""
+    if PER_THREAD_PROFILERS:
+        if getattr(_profile_state, "active", False):
+            return False
+        _profile_state.active = True
+        return True
+    return _process_profile_lock.acquire(blocking=False)
+
+
+def _release_profiler():
+    if PER_THREAD_PROFILERS:
+        _profile_state.active = False
+    else:
+        _process_profile_lock.release()
+
+
+@contextmanager
+def profiled(name, profile_dir=PROFILE_DIR):
+    """Run the block under cProfile when profiling is enabled (PROFILE_DIR set).
+
+    Writes `{name}-{timestamp}-{thread}.prof`; open it with `snakeviz` or
+    `python -m pstats`. Only the outermost profiled block runs a profiler:
+    per thread before Python 3.12, where each ingestion worker thread writes
+    its own file, and per process from 3.12, where that one profile covers
+    all threads and nested or concurrent blocks are not profiled separately.
+    Profiling never fails the block it wraps. For a whole-process view
+    without code changes, run `py-spy record --threads`; worker threads are
+    named by role.
+    """
+    if not profile_dir or not _claim_profiler():
+        yield
+        return
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiling tool (coverage, a debugger) holds the slot.
+            logging.warning(f"Not profiling {name}: {e}")
+            profiler = None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                path = os.path.join(profile_dir, f"{name}-{timestamp}-{threading.current_thread().name}.prof")
+                try:
+                    os.makedirs(profile_dir, exist_ok=True)
+                    profiler.dump_stats(path)
+                    logging.info(f"Wrote profile {path}")
+                except OSError as e:
+                    logging.warning(f"Could not write profile {path}: {e}")
+    finally:
+        _release_profiler()
@@ -0,0 +1,225 @@
+import argparse
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+from src.get_knowledge import (
+    ArticleExtractor,
+    ContentExtractor,
+    PDFExtractor,
+    YouTubeExtractor,
+    is_extraction_error,
+)
+from src.config import check_collection_name
+from src.constants import COLLECTION_NAME
+from src.metrics import configure_metrics, metrics
+
+EXTRACTORS = {
+    "youtube": YouTubeExtractor,
+    "article": ArticleExtractor,
+    "pdf": PDFExtractor,
+}
+
+
+def detect_source_type(source: str) -> str:
+    """Guess the extractor for a source: YouTube URL, other URL, or local PDF."""
+    parsed = urlparse(source)
+    if parsed.scheme in ("http", "https"):
+        host = parsed.netloc.lower()
+        if "youtube.com" in host or "youtu.be" in host:
+            return "youtube"
+        if parsed.path.lower().endswith(".pdf"):
+            raise ValueError("Remote PDFs are not supported; download the file first")
+        return "article"
+    if source.lower().endswith(".pdf"):
+        return "pdf"
+    raise ValueError(f"Unrecognized source: {source}")
+
+
+def read_sources(paths: Iterable[str]) -> List[str]:
+    """Expand CLI arguments into sources; `.txt` arguments are read as source lists."""
+    sources = []
+    for path in paths:
+        if path.endswith(".txt") and os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        sources.append(line)
+        else:
+            sources.append(path)
+    # Preserve order but never fetch the same source twice in one run.
+    return list(dict.fromkeys(sources))
+
+
+def _process_pdf(source: str, collection_name: str) -> str:
+    # Runs in a worker process, so it must be a picklable module-level function.
+    return ContentExtractor(PDFExtractor(), collection_name).process_source(source)
+
+
+@dataclass
+class SourceResult:
+    source: str
+    source_type: str
+    ok: bool = False
+    attempts: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class BulkIngestionReport:
+    results: List[SourceResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def summary(self) -> str:
+        by_type = Counter(r.source_type for r in self.results if r.ok)
+        lines = [
+            f"Processed {len(self.results)} sources in {self.seconds:.1f}s: "
+            f"{len(self.results) - len(self.failed)} ok, {len(self.failed)} failed",
+        ]
+        lines += [f"  {source_type}: {count} ok" for source_type, count in sorted(by_type.items())]
+        for result in self.failed:
+            lines.append(f"  FAILED {result.source} after {result.attempts} attempt(s): {result.error}")
+        return "\n".join(lines)
+
+
+class BulkIngestor:
+    """Extract many sources concurrently into a knowledge base's data directory (`data/` by default).
+
+    Network-bound sources (YouTube, articles) run on a bounded thread pool with
+    at most `per_domain` requests in flight per host; PDFs are parsed on a
+    process pool. Failures are retried with exponential backoff and jitter.
+    """
+
+    def __init__(self, workers=8, pdf_workers=None, per_domain=2, retries=3, backoff=1.0,
+                 collection_name=COLLECTION_NAME):
+        self.workers = workers
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        self.per_domain = per_domain
+        self.retries = retries
+        self.backoff = backoff
+        self.collection_name = collection_name
+        self._domain_limits = defaultdict(lambda: threading.BoundedSemaphore(self.per_domain))
+        self._domain_lock = threading.Lock()
+
+    def _domain_semaphore(self, source):
+        with self._domain_lock:
+            return self._domain_limits[urlparse(source).netloc.lower()]
+
+    def _with_retries(self, result, fetch):
+        start = time.perf_counter()
+        for attempt in range(1, self.retries + 1):
+            result.attempts = attempt
+            try:
+                content = fetch()
+                if not is_extraction_error(content):
+                    result.ok, result.error = True, None
+                    break
+                result.error = content or "Empty content"
+                if content and content.startswith("URL validation error"):
+                    break  # retrying will not fix a malformed URL
+            except Exception as e:
+                result.error = str(e)
+            if attempt < self.retries:
+                delay = self.backoff * 2 ** (attempt - 1) * (1 + random.random())
+                logging.info(f"Retrying {result.source} in {delay:.1f}s ({result.error})")
+                time.sleep(delay)
+        result.seconds = time.perf_counter() - start
+        metrics.observe("extract_seconds", result.seconds, source_type=result.source_type)
+        metrics.inc("extract_sources_total", source_type=result.source_type, result="ok" if result.ok else "failed")
+        metrics.inc("extract_attempts_total", result.attempts, source_type=result.source_type)
+        return result
+
+    def _fetch_network(self, source, source_type):
+        result = SourceResult(source, source_type)
+        extractor = ContentExtractor(EXTRACTORS[source_type](), self.collection_name)
+
+        def fetch():
+            with self._domain_semaphore(source):
+                return extractor.process_source(source)
+
+        return self._with_retries(result, fetch)
+
+    def _fetch_pdf(self, pool, source):
+        result = SourceResult(source, "pdf")
+        return self._with_retries(result, lambda: pool.submit(_process_pdf, source, self.collection_name).result())
+
+    def run(self, sources: Iterable[str]) -> BulkIngestionReport:
+        report = BulkIngestionReport()
+        start = time.perf_counter()
+        network_sources, pdf_sources = [], []
+        for source in sources:
+            try:
+                source_type = detect_source_type(source)
+            except ValueError as e:
+                report.results.append(SourceResult(source, "unknown", error=str(e)))
+                continue
+            (pdf_sources if source_type == "pdf" else network_sources).append((source, source_type))
+
+        logging.info(
+            f"Bulk ingesting {len(network_sources)} network sources and {len(pdf_sources)} PDFs"
+        )
+        pdf_pool = ProcessPoolExecutor(max_workers=self.pdf_workers) if pdf_sources else None
+        # PDFs get their own driver threads so waiting on the process pool (and
+        # their retries) never occupies a network worker.
+        with ThreadPoolExecutor(max_workers=self.workers) as network_pool, \
+                ThreadPoolExecutor(max_workers=self.pdf_workers) as pdf_drivers:
+            futures = [network_pool.submit(self._fetch_network, s, t) for s, t in network_sources]
+            futures += [pdf_drivers.submit(self._fetch_pdf, pdf_pool, s) for s, _ in pdf_sources]
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    report.results.append(result)
+                    status = "ok" if result.ok else f"failed: {result.error}"
+                    logging.info(f"[{len(report.results)}] {result.source} {status}")
+            finally:
+                if pdf_pool:
+                    pdf_pool.shutdown()
+        report.seconds = time.perf_counter() - start
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract many YouTube/article/PDF sources into data/.")
+    parser.add_argument("sources", nargs="+", help="URLs, PDF paths, or .txt files listing one source per line")
+    parser.add_argument("--workers", type=int, default=8, help="threads for network sources")
+    parser.add_argument("--pdf-workers", type=int, default=None, help="processes for PDF parsing")
+    parser.add_argument("--per-domain", type=int, default=2, help="max concurrent requests per host")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--collection", default=COLLECTION_NAME, type=check_collection_name,
+                        help="knowledge base to extract into (and index, with --index)")
+    parser.add_argument("--index", action="store_true", help="run ingestion into Qdrant afterwards")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    configure_metrics()
+    ingestor = BulkIngestor(
+        workers=args.workers,
+        pdf_workers=args.pdf_workers,
+        per_domain=args.per_domain,
+        retries=args.retries,
+        collection_name=args.collection,
+    )
+    report = ingestor.run(read_sources(args.sources))
+    print(report.summary())
+
+    if args.index:
+        from src.pipeline.ingestion_pipeline import run_ingestion
+        run_ingestion(collection_name=args.collection)
+
+    raise SystemExit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
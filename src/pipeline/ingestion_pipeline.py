@@ -1,38 +1,289 @@
 import logging
-from src.utils import load_doc_using_langchain
-from src.rag_db.chunking import TextChunker
-from src.rag_db.embedding import Embedder
-from src.rag_db.vectorstore import VectorStoreManager
+import time
+from pathlib import Path
+from src.utils import (
+    get_all_text_files,
+    hash_file,
+    hash_text,
+    hash_to_point_id,
+    iter_text_blocks,
+    iter_transcript_segments,
+    read_source_metadata,
+    read_transcript_timings,
+)
+from src.rag_db.chunking import StreamingChunker
+from src.rag_db.vectorstore import get_vector_store
+from src.pipeline.manifest import IngestionManifest
+from src.pipeline.stages import Pipeline, Stage
+from src.metrics import metrics, profiled
 from src.utils import format_documents
-from src.constants import PROMPT_TEMPLATES
+from src.config import ConfigManager
+from src.constants import (
+    COLLECTION_NAME,
+    INGEST_BATCH_SIZE,
+    INGEST_QUEUE_SIZE,
+    INGEST_STAGE_WORKERS,
+    PROMPT_TEMPLATES,
+)
 
-def run_ingestion(reset_db=False):
-    logging.info("Starting document ingestion process")
+def document_metadata(path):
+    """Payload metadata shared by every chunk of the extracted file at `path`."""
+    metadata = read_source_metadata(path)
+    source = metadata.get("source") or str(path)
+    return {
+        "source": source,
+        # Files dropped into the data dir by hand: infer the type from the folder.
+        "extractor": metadata.get("extractor") or path.parent.name.removesuffix("_data"),
+        "document_id": metadata.get("document_id") or hash_text(source),
+        "file": str(path),
+    }
+
+
+# Chunk metadata describing where the chunk sits inside one particular document.
+POSITION_FIELDS = ("chunk_index", "page", "start_offset", "end_offset", "start_time", "end_time", "timestamp")
+
+
+def reassign_shared_chunks(vector_store, manifest, point_ids):
+    """Point surviving shared chunks at a file that still contains them.
+
+    A chunk is stored once, with the metadata of the first document it was
+    ingested from. When that document is deleted or rewritten while another
+    still contains the chunk, the point would keep naming the dead source.
+    """
+    if not point_ids:
+        return
+    referrers = manifest.referrers(point_ids)
+    updates = {}
+    for point_id, metadata in vector_store.stored_metadata(point_ids).items():
+        files = referrers.get(point_id)
+        if not files or metadata.get("file") in files:
+            continue
+        file_path = files[0]
+        # Page, offsets and timings were the old document's; only the ordinal is known here.
+        kept = {key: value for key, value in metadata.items() if key not in POSITION_FIELDS}
+        updates[point_id] = {
+            **kept,
+            **document_metadata(Path(file_path)),
+            "chunk_index": manifest.get(file_path)["point_ids"].index(point_id),
+        }
+    if updates:
+        logging.info(f"Reassigning {len(updates)} shared chunks to the files that still contain them")
+        vector_store.set_metadata(updates)
+
+
+def update_kept_positions(vector_store, kept_positions):
+    """Refresh where re-ingested but unchanged chunks now sit in their file.
+
+    `kept_positions` maps point ID -> {file path: position metadata} for
+    chunks of changed files that were already stored and so not re-embedded.
+    A point is updated from the file its stored metadata names, if that file
+    was re-chunked and the position differs.
+    """
+    if not kept_positions:
+        return
+    updates = {}
+    for point_id, metadata in vector_store.stored_metadata(kept_positions).items():
+        positions = kept_positions[point_id].get(metadata.get("file"))
+        if positions is None:
+            continue
+        updated = {
+            **{key: value for key, value in metadata.items() if key not in POSITION_FIELDS},
+            **positions,
+        }
+        if updated != metadata:
+            updates[point_id] = updated
+    if updates:
+        logging.info(f"Updating the position of {len(updates)} unchanged chunks in changed files")
+        vector_store.set_metadata(updates)
+
+
+def run_ingestion(reset_db=False, vector_store=None, manifest=None, data_dir=None, chunker=None,
+                  workers=None, collection_name=COLLECTION_NAME):
+    """Bring the vector store in sync with the `.txt` files under `data_dir`.
+
+    `collection_name` picks the knowledge base: unless given explicitly, the
+    vector store, manifest and data directory are that collection's, and
+    `reset_db` wipes only that collection.
+
+    Only files that are new or changed since the last run (per the ingestion
+    manifest) are read and chunked; of those, only chunks not already stored
+    are embedded. Points belonging to deleted files or dropped chunks are
+    removed unless another file still references them.
+
+    Every new chunk carries its source URL/path, extractor, document ID, chunk
+    ordinal within the document and ingest time as payload metadata, taken
+    from the `.meta.json` sidecar the extractors write next to each file.
 
-    documents = load_doc_using_langchain()
-    logging.info(f"Loaded {len(documents)} documents")
+    Files flow through concurrent load -> chunk -> dedup -> embed -> upsert
+    stages joined by bounded queues, so the embedder keeps working while
+    Qdrant calls are in flight. `workers` overrides INGEST_STAGE_WORKERS per
+    stage name; per-stage throughput is logged at the end.
+    """
+    with profiled("ingest"), metrics.span("ingest"):
+        return _run_ingestion(reset_db, vector_store, manifest, data_dir, chunker, workers, collection_name)
 
-    chunker = TextChunker()
-    embedder = Embedder()
-    vector_store = VectorStoreManager(embedder)
+
+def _run_ingestion(reset_db, vector_store, manifest, data_dir, chunker, workers, collection_name):
+    logging.info("Starting document ingestion process")
+    start = time.perf_counter()
+
+    if chunker is None:
+        chunker = StreamingChunker()
+    if vector_store is None:
+        vector_store = get_vector_store(collection_name)
+    if manifest is None:
+        manifest = IngestionManifest.for_collection(collection_name)
+    if data_dir is None:
+        data_dir = ConfigManager(collection_name).data_dir
+    workers = {**INGEST_STAGE_WORKERS, **(workers or {})}
+    if vector_store.backend != "server":
+        # Embedded Qdrant mutates in-process arrays and is not safe for concurrent writes.
+        workers["upsert"] = 1
 
     if reset_db:
         logging.info("Resetting the collection before ingestion")
         vector_store.reset_collection()
+        manifest.clear()
+    elif manifest.files and vector_store.count() == 0:
+        # The collection was wiped behind our back (e.g. a non-persistent Qdrant
+        # restarted), so the manifest no longer describes what is stored.
+        logging.info("Collection is empty; discarding stale ingestion manifest")
+        manifest.clear()
+
+    data_path = Path(data_dir)
+    current_files = {str(p): p for p in get_all_text_files(data_path)} if data_path.exists() else {}
+    stale_point_ids = set()
+
+    for file_path in set(manifest.files) - set(current_files):
+        logging.info(f"Source removed: {file_path}")
+        stale_point_ids |= manifest.remove(file_path)
+
+    # Stages only read the manifest; updates are applied once everything is stored.
+    touched = []
+    changed = []
+    added = []
+    kept_positions = {}
+
+    def load(item):
+        file_path, path = item
+        stat = path.stat()
+        if manifest.is_unchanged(file_path, stat):
+            return
+        content_hash = hash_file(path)
+        entry = manifest.get(file_path)
+        if entry and entry["content_hash"] == content_hash:
+            # Touched but not modified; just refresh size/mtime.
+            touched.append((file_path, stat, entry))
+            return
+        yield file_path, path, stat, content_hash, entry
+
+    def chunk(item):
+        file_path, path, stat, content_hash, entry = item
+        logging.info(f"Processing {file_path}")
+        previous_hashes = set(entry["chunk_hashes"]) if entry else set()
+        chunk_hashes = []
+        queued = 0
+        base_metadata = {**document_metadata(path), "ingested_at": time.time()}
+        timings = read_transcript_timings(path, content_hash)
+        if timings is not None:
+            # Transcripts with caption timings are chunked on caption boundaries
+            # and their chunks carry timestamps.
+            docs = chunker.split_segments(iter_transcript_segments(path, timings))
+        else:
+            # Stream block by block so large extracts (e.g. 1000-page PDFs) are never
+            # held in memory as a whole; pages and offsets end up in the chunk metadata.
+            docs = chunker.split_blocks(iter_text_blocks(path))
+        for chunk_index, doc in enumerate(docs):
+            chunk_hash = hash_text(doc.page_content)
+            chunk_hashes.append(chunk_hash)
+            if chunk_hash not in previous_hashes:
+                # Chunks are stored once per text, so a chunk shared with an
+                # already-ingested document keeps that document's metadata
+                # (until that document goes away; see reassign_shared_chunks).
+                doc.metadata.update(base_metadata, chunk_index=chunk_index)
+                queued += 1
+                yield doc
+            else:
+                # Already stored, but earlier text in the file may have moved it.
+                kept_positions.setdefault(hash_to_point_id(chunk_hash), {}).setdefault(
+                    file_path,
+                    {key: value for key, value in doc.metadata.items() if key in POSITION_FIELDS}
+                    | {"chunk_index": chunk_index},
+                )
+        if queued:
+            logging.info(f"Queued {queued} new chunks from {file_path}")
+        changed.append((file_path, stat, content_hash, chunk_hashes, entry))
+
+    # New chunks are pooled across files so small documents still get one
+    # existence lookup per INGEST_BATCH_SIZE chunks and full embedding batches.
+    pending = []
+    queued_ids = set()
+
+    def dedup(doc):
+        pending.append(doc)
+        if len(pending) >= INGEST_BATCH_SIZE:
+            yield from flush_pending()
+
+    def flush_pending():
+        if not pending:
+            return
+        new_docs = vector_store.new_documents(list(pending))
+        pending.clear()
+        # Also skip chunks an earlier batch of this run already sent downstream.
+        items = [(point_id, doc) for point_id, doc in new_docs.items() if point_id not in queued_ids]
+        queued_ids.update(point_id for point_id, _ in items)
+        for start in range(0, len(items), vector_store.embed_batch_size):
+            yield dict(items[start:start + vector_store.embed_batch_size])
+
+    def embed(new_docs):
+        yield new_docs, vector_store.embed_documents(new_docs.values())
+
+    def upsert(item):
+        new_docs, vectors = item
+        vector_store.upsert(new_docs, vectors)
+        added.append(len(new_docs))
+        return ()
 
-    total_chunks = 0
-    for i, doc in enumerate(documents):
-        logging.info(f"Processing document {i + 1}/{len(documents)}")
+    if current_files:
+        # Load the tokenizer once up front rather than racing in the chunk workers.
+        chunker.tokenizer
+        pipeline = Pipeline([
+            Stage("load", load, workers["load"]),
+            Stage("chunk", chunk, workers["chunk"]),
+            Stage("dedup", dedup, 1, flush=flush_pending),
+            Stage("embed", embed, workers["embed"], size=len),
+            Stage("upsert", upsert, workers["upsert"], size=lambda item: len(item[0])),
+        ], queue_size=INGEST_QUEUE_SIZE)
+        pipeline.run(sorted(current_files.items()))
 
-        chunks = chunker.get_chunks(doc)
+    for file_path, stat, entry in touched:
+        manifest.update(file_path, stat, entry["content_hash"], entry["chunk_hashes"], entry["point_ids"])
+    for file_path, stat, content_hash, chunk_hashes, entry in changed:
+        if entry:
+            stale_point_ids |= set(entry["point_ids"])
+        manifest.update(
+            file_path, stat, content_hash, chunk_hashes,
+            [hash_to_point_id(h) for h in chunk_hashes],
+        )
 
-        if chunks:
-            vector_store.add(chunks)
-            chunk_count = len(chunks)
-            total_chunks += chunk_count
-            logging.info(f"Added {chunk_count} chunks from document {i + 1}")
+    # A chunk dropped from one file may still be present in another.
+    referenced_point_ids = manifest.referenced_point_ids()
+    vector_store.delete(stale_point_ids - referenced_point_ids)
+    update_kept_positions(vector_store, kept_positions)
+    reassign_shared_chunks(vector_store, manifest, stale_point_ids & referenced_point_ids)
+    vector_store.save_sparse_index()
+    manifest.save()
 
-    logging.info(f"\u2705 Successfully added {total_chunks} chunks to the vector store.")
+    skipped_files = len(current_files) - len(changed)
+    seconds = time.perf_counter() - start
+    metrics.inc("ingest_files_total", len(changed), status="changed")
+    metrics.inc("ingest_files_total", skipped_files, status="unchanged")
+    metrics.inc("ingest_chunks_total", sum(added))
+    metrics.set("ingest_chunks_per_second", sum(added) / seconds if seconds else 0.0)
+    logging.info(
+        f"✅ Successfully added {sum(added)} chunks to the vector store "
+        f"({skipped_files} unchanged files skipped)."
+    )
     return vector_store
 
 
@@ -45,4 +296,4 @@ if __name__ == "__main__":
     # use_case = input("Enter the use case (podcast_summary, science_explainer, code_analysis): ")
     prompt = PROMPT_TEMPLATES["podcast_summary"].format(context=formated_doc)
     print(prompt) 
-    # print(run_gemini(prompt))
\ No newline at end of file
+    # print(run_gemini(prompt))
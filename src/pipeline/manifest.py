@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+from pathlib import Path
+from src.constants import CACHE_DIR_NAME, COLLECTION_NAME, MANIFEST_FILE_NAME
+
+
+class IngestionManifest:
+    """Persistent record of which data files have been ingested.
+
+    Each entry is keyed by file path and stores the file's size, mtime, content
+    hash and the chunk hashes / point IDs it contributed, so `run_ingestion` can
+    skip unchanged files and only touch the chunks that actually changed.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR_NAME, MANIFEST_FILE_NAME)):
+        self.path = Path(path)
+        self.files = {}
+        self.load()
+
+    @classmethod
+    def for_collection(cls, collection_name, cache_dir=os.path.join(CACHE_DIR_NAME, "manifests")):
+        """The manifest of one knowledge base; the default collection keeps the original file."""
+        if collection_name == COLLECTION_NAME:
+            return cls()
+        return cls(os.path.join(cache_dir, f"{collection_name}.json"))
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            self.files = {}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.files = {}
+
+    def get(self, file_path):
+        return self.files.get(str(file_path))
+
+    def is_unchanged(self, file_path, stat):
+        entry = self.get(file_path)
+        return (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime"] == stat.st_mtime_ns
+        )
+
+    def update(self, file_path, stat, content_hash, chunk_hashes, point_ids):
+        self.files[str(file_path)] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "content_hash": content_hash,
+            "chunk_hashes": chunk_hashes,
+            "point_ids": point_ids,
+        }
+
+    def remove(self, file_path):
+        """Drop a file from the manifest and return the point IDs it referenced."""
+        entry = self.files.pop(str(file_path), None)
+        return set(entry["point_ids"]) if entry else set()
+
+    def referenced_point_ids(self):
+        return {point_id for entry in self.files.values() for point_id in entry["point_ids"]}
+
+    def referrers(self, point_ids):
+        """Map each of `point_ids` to the files that reference it, in path order."""
+        point_ids = set(point_ids)
+        referrers = {point_id: [] for point_id in point_ids}
+        for file_path, entry in sorted(self.files.items()):
+            for point_id in point_ids.intersection(entry["point_ids"]):
+                referrers[point_id].append(file_path)
+        return referrers
@@ -0,0 +1,208 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+from src.metrics import metrics, profiled
+
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """Raised inside workers once another stage has failed."""
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    # Work units (e.g. chunks in a batch) as counted by the stage's `size`.
+    units: int = 0
+    busy_seconds: float = 0.0
+    # Time spent waiting for room in the downstream queue (backpressure).
+    blocked_seconds: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def wall_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def units_per_second(self):
+        return self.units / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def utilization(self):
+        """Share of the stage's worker time spent working, in [0, 1]."""
+        return self.busy_seconds / (self.wall_seconds * self.workers) if self.wall_seconds else 0.0
+
+    def summary(self):
+        return (
+            f"{self.name:<8} workers={self.workers} in={self.items_in} out={self.items_out} "
+            f"units/s={self.units_per_second:.1f} busy={self.utilization:.0%} "
+            f"blocked={self.blocked_seconds:.2f}s"
+        )
+
+
+class Stage:
+    """One step of a `Pipeline`.
+
+    `fn(item)` returns an iterable of outputs for the next stage (empty to drop
+    the item, several to fan out). `flush()`, if given, runs once after the
+    last input and may emit trailing outputs; stages that accumulate state
+    across items (like batching) should use a single worker. `size(item)`
+    counts the work units in an input for the throughput metrics.
+    """
+
+    def __init__(self, name: str, fn: Callable[[object], Iterable], workers: int = 1,
+                 flush: Optional[Callable[[], Iterable]] = None, size: Callable[[object], int] = lambda item: 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.flush = flush
+        self.size = size
+        self.metrics = StageMetrics(name, self.workers)
+
+
+class Pipeline:
+    """Runs stages concurrently, each on its own worker threads.
+
+    Stages are connected by bounded queues, so a slow stage makes upstream
+    stages block instead of buffering without limit. Threads suit the work
+    here: file I/O, the tokenizer, the embedding model and Qdrant calls all
+    release the GIL. If any stage raises, the whole pipeline stops and `run`
+    re-raises the first error.
+    """
+
+    def __init__(self, stages, queue_size=8):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self._failed = threading.Event()
+        self._error = None
+        self._lock = threading.Lock()
+
+    def _put(self, q, item):
+        """Put with backpressure; returns the seconds spent waiting for room."""
+        start = time.perf_counter()
+        while True:
+            if self._failed.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.1)
+                return time.perf_counter() - start
+            except queue.Full:
+                continue
+
+    def _get(self, q):
+        while True:
+            if self._failed.is_set():
+                raise PipelineAborted()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _emit(self, outputs, out_queue, stats):
+        # Outputs are forwarded as they are produced, so a fan-out stage (one
+        # file in, many chunks out) never holds its whole output.
+        blocked = 0.0
+        for output in outputs or ():
+            with self._lock:
+                stats.items_out += 1
+            if out_queue is not None:
+                blocked += self._put(out_queue, output)
+        with self._lock:
+            stats.blocked_seconds += blocked
+        return blocked
+
+    def _work(self, stage, in_queue, out_queue, remaining):
+        # Everything, profiling included, runs inside the guard: a worker that
+        # dies without recording the failure would leave the pipeline hanging.
+        try:
+            with profiled(f"ingest-{stage.name}"):
+                self._work_loop(stage, in_queue, out_queue, remaining)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+            logging.exception(f"Ingestion stage '{stage.name}' failed")
+            self._failed.set()
+
+    def _work_loop(self, stage, in_queue, out_queue, remaining):
+        stats = stage.metrics
+        while True:
+            item = self._get(in_queue)
+            if item is _DONE:
+                # Pass the marker on so sibling workers stop too.
+                self._put(in_queue, _DONE)
+                break
+            start = time.perf_counter()
+            with self._lock:
+                if stats.started_at is None:
+                    stats.started_at = start
+                stats.items_in += 1
+                stats.units += stage.size(item)
+            blocked = self._emit(stage.fn(item), out_queue, stats)
+            with self._lock:
+                stats.busy_seconds += time.perf_counter() - start - blocked
+
+        with self._lock:
+            remaining[stage.name] -= 1
+            last = remaining[stage.name] == 0
+        if last:
+            if stage.flush is not None:
+                self._emit(stage.flush(), out_queue, stats)
+            stats.finished_at = time.perf_counter()
+            if out_queue is not None:
+                self._put(out_queue, _DONE)
+
+    def _export(self, stage_metrics):
+        logging.info(f"Stage {stage_metrics.summary()}")
+        name = stage_metrics.name
+        metrics.inc("ingest_stage_units_total", stage_metrics.units, stage=name)
+        metrics.inc("ingest_stage_busy_seconds_total", stage_metrics.busy_seconds, stage=name)
+        metrics.inc("ingest_stage_blocked_seconds_total", stage_metrics.blocked_seconds, stage=name)
+        metrics.set("ingest_stage_units_per_second", stage_metrics.units_per_second, stage=name)
+        metrics.set("ingest_stage_utilization", stage_metrics.utilization, stage=name)
+
+    def run(self, items):
+        """Feed `items` to the first stage and wait for every stage to finish."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = {stage.name: stage.workers for stage in self.stages}
+        threads = []
+        for i, stage in enumerate(self.stages):
+            out_queue = queues[i + 1] if i + 1 < len(self.stages) else None
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(stage, queues[i], out_queue, remaining),
+                    name=f"ingest-{stage.name}-{n}", daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                self._put(queues[0], item)
+            self._put(queues[0], _DONE)
+        except PipelineAborted:
+            pass
+        except BaseException:
+            self._failed.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+        for stage in self.stages:
+            self._export(stage.metrics)
+        return [stage.metrics for stage in self.stages]
@@ -1 +1,271 @@
- 
\ No newline at end of file
+import json
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from src.constants import (
+    COLLECTION_NAME,
+    GEMINI_MODEL_NAME,
+    MMR_LAMBDA,
+    PROMPT_TEMPLATES,
+    QUERY_FANOUT_WORKERS,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RETRIEVAL_MODE,
+)
+from src.llms import run_gemini, stream_gemini
+from src.metrics import metrics, profiled
+from src.rag_db.reranker import get_reranker, mmr_select
+from src.rag_db.sparse_index import reciprocal_rank_fusion
+from src.response_cache import ResponseCache
+from src.context_builder import build_context
+from src.utils import hash_text, hash_to_point_id
+
+
+class QueryService:
+    """Query-side entry point that keeps the embedder and Qdrant connection alive.
+
+    Nothing is loaded until the first call, and ingestion only happens when
+    `ingest` is called explicitly, so a query costs one query embedding plus
+    the ANN search.
+
+    `collection_name` is the default knowledge base. Searches and questions
+    can be routed to other ones with `collections`: each collection is searched
+    in parallel and the results are merged into one top-k, by cosine score for
+    dense search and by rank (RRF) for sparse and hybrid search.
+    """
+
+    def __init__(self, collection_name=COLLECTION_NAME, response_cache=None, rerank=RERANK_ENABLED):
+        self.collection_name = collection_name
+        self.rerank = rerank
+        self._response_cache = response_cache
+        self._vector_store = None
+        self._fanout = None
+        self._lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    logging.info(f"Initializing query service for '{self.collection_name}'")
+                    self._vector_store = self._get_vector_store(self.collection_name)
+        return self._vector_store
+
+    @property
+    def embedder(self):
+        """The embedder every collection shares; getting it does not open the default collection."""
+        from src.rag_db.embedding import get_embedder
+        return get_embedder()
+
+    @staticmethod
+    def _get_vector_store(collection_name, create=True):
+        # Deferred so importing this module loads neither LangChain nor the Qdrant client.
+        from src.rag_db.vectorstore import get_vector_store
+        return get_vector_store(collection_name, create=create)
+
+    def _collections(self, collections):
+        """Distinct, sorted collection names to query, or None for just the default one."""
+        if not collections:
+            return None
+        if isinstance(collections, str):
+            collections = [collections]
+        names = sorted(set(collections))
+        return None if names == [self.collection_name] else names
+
+    def _stores(self, collections):
+        names = self._collections(collections)
+        if names is None:
+            return [self.vector_store]
+        return [self._get_vector_store(name, create=False) for name in names]
+
+    def sources(self, collections=None, limit=100):
+        """(source, chunk count) pairs in the default collection or across `collections`."""
+        counts = Counter()
+        for store in self._stores(collections):
+            counts.update(dict(store.sources(limit)))
+        return counts.most_common()
+
+    def knowledge_bases(self):
+        from src.rag_db.vectorstore import list_collections
+        return list_collections()
+
+    @property
+    def response_cache(self):
+        if self._response_cache is None:
+            with self._lock:
+                if self._response_cache is None:
+                    self._response_cache = ResponseCache()
+        return self._response_cache
+
+    def ingest(self, reset_db=False, collection_name=None):
+        """Sync a knowledge base (default: this service's) with its data directory.
+
+        `reset_db` wipes and rebuilds only that collection.
+        """
+        from src.pipeline.ingestion_pipeline import run_ingestion
+        collection_name = collection_name or self.collection_name
+        vector_store = self.vector_store if collection_name == self.collection_name else \
+            self._get_vector_store(collection_name)
+        # Streamlit sessions share this service; serialize manifest updates.
+        with self._ingest_lock:
+            return run_ingestion(reset_db=reset_db, vector_store=vector_store, collection_name=collection_name)
+
+    def search(self, query, k=5, mode=RETRIEVAL_MODE, query_vector=None, filters=None, collections=None):
+        """Top-k chunks from the default collection, or merged across `collections`."""
+        names = self._collections(collections)
+        if names is None:
+            return self.vector_store.search(query, k=k, mode=mode, query_vector=query_vector, filters=filters)
+        with metrics.span("search_fanout", collections=len(names)):
+            return self._search_collections(query, k, mode, query_vector, filters, names)
+
+    def _search_collections(self, query, k, mode, query_vector, filters, names):
+        stores = [self._get_vector_store(name, create=False) for name in names]
+        if query_vector is None and mode != "sparse":
+            # All collections share the embedder; embed the query once.
+            query_vector = self.embedder.model.embed_query(query)
+        if self._fanout is None:
+            with self._lock:
+                if self._fanout is None:
+                    self._fanout = ThreadPoolExecutor(max_workers=QUERY_FANOUT_WORKERS, thread_name_prefix="fanout")
+        if mode == "dense":
+            futures = [
+                self._fanout.submit(store.similarity_search_with_score_by_vector, query_vector, k=k, filters=filters)
+                for store in stores
+            ]
+            # Cosine scores from one embedding model are comparable across collections.
+            best = {}
+            for future in futures:
+                for doc, score in future.result():
+                    point_id = doc.metadata["_id"]
+                    if point_id not in best or score > best[point_id][1]:
+                        best[point_id] = (doc, score)
+            return [doc for doc, _ in sorted(best.values(), key=lambda item: item[1], reverse=True)[:k]]
+        futures = [
+            self._fanout.submit(store.search, query, k=k, mode=mode, query_vector=query_vector, filters=filters)
+            for store in stores
+        ]
+        # BM25 scores depend on each collection's statistics, so merge by rank.
+        # A chunk stored in several collections has the same point ID everywhere.
+        rankings, docs = [], {}
+        for future in futures:
+            ranking = []
+            for doc in future.result():
+                ranking.append(doc.metadata["_id"])
+                docs.setdefault(doc.metadata["_id"], doc)
+            rankings.append(ranking)
+        return [docs[point_id] for point_id, _ in reciprocal_rank_fusion(rankings)[:k]]
+
+    def retrieve(self, query, k=5, query_vector=None, filters=None, collections=None):
+        """Chunks to put in the prompt: over-fetch, rerank, then diversify with MMR."""
+        if not self.rerank:
+            return self.search(query, k=k, query_vector=query_vector, filters=filters, collections=collections)
+        candidates = self.search(
+            query, k=max(k, RERANK_CANDIDATES), query_vector=query_vector, filters=filters, collections=collections
+        )
+        if len(candidates) <= 1:
+            return candidates
+        with metrics.span("rerank"):
+            ranked, relevance = get_reranker().rerank(query, candidates)
+            # Chunk vectors come back from the embedding cache, not the model.
+            doc_vectors = self.embedder.model.embed_documents([doc.page_content for doc in ranked])
+            return [ranked[i] for i in mmr_select(relevance, doc_vectors, k, lambda_mult=MMR_LAMBDA)]
+
+    def _prepare(self, query, use_case, k, model_name, query_vector=None, filters=None, collections=None):
+        """Resolve a question to either a cached response or a prompt to send.
+
+        Returns (response, prompt, cache_entry); exactly one of response and
+        prompt is set, and cache_entry holds what `_remember` needs.
+        """
+        template = PROMPT_TEMPLATES[use_case]
+        # Keyed on the template text, so editing a template invalidates its answers.
+        template_id = hash_text(template)
+        if filters:
+            # A filtered question must not be answered from an unfiltered one.
+            template_id = hash_text(template_id + json.dumps(filters, sort_keys=True, default=str))
+        collections = self._collections(collections)
+        if collections:
+            # Nor from a question asked of other knowledge bases.
+            template_id = hash_text(template_id + json.dumps(collections))
+        if query_vector is None:
+            query_vector = self.embedder.model.embed_query(query)
+
+        response = self.response_cache.get_similar(
+            model_name, template_id, query_vector, lambda hashes: self._chunks_stored(hashes, collections)
+        )
+        if response is not None:
+            return response, None, None
+
+        docs = self.retrieve(query, k=k, query_vector=query_vector, filters=filters, collections=collections)
+        chunk_hashes = [doc.metadata.get("hash") or hash_text(doc.page_content) for doc in docs]
+        key = ResponseCache.make_key(model_name, template_id, chunk_hashes)
+        response = self.response_cache.get(key)
+        if response is not None:
+            logging.info("Response cache hit")
+            return response, None, None
+
+        prompt = template.format(context=build_context(docs, use_case).text)
+        return None, prompt, (key, model_name, template_id, query, query_vector, chunk_hashes)
+
+    def _chunks_stored(self, chunk_hashes, collections=None):
+        """Whether every chunk is still stored in the default collection or one of `collections`."""
+        missing = {hash_to_point_id(chunk_hash) for chunk_hash in chunk_hashes}
+        for store in self._stores(collections):
+            if not missing:
+                break
+            missing -= store.existing_point_ids(list(missing))
+        return not missing
+
+    def _remember(self, cache_entry, response):
+        key, model_name, template_id, query, query_vector, chunk_hashes = cache_entry
+        self.response_cache.put(
+            key, model_name, template_id, response, query=query, query_vector=query_vector, chunk_hashes=chunk_hashes
+        )
+
+    def ask(self, query, use_case="podcast_summary", k=5, model_name=GEMINI_MODEL_NAME, query_vector=None,
+            filters=None, collections=None):
+        with profiled("ask"), metrics.span("ask", use_case=use_case):
+            response, prompt, cache_entry = self._prepare(
+                query, use_case, k, model_name, query_vector, filters, collections
+            )
+            if response is None:
+                response = run_gemini(prompt, model_name=model_name)
+                self._remember(cache_entry, response)
+            return response
+
+    def ask_stream(self, query, use_case="podcast_summary", k=5, model_name=GEMINI_MODEL_NAME, timings=None,
+                   filters=None, collections=None):
+        """Like `ask`, but yields the answer as it is generated.
+
+        Cached answers are yielded in one piece. Pass a GenerationTimings to get
+        time-to-first-token and total latency once the generator is exhausted.
+        `filters` restricts retrieval by chunk metadata, e.g.
+        {"extractor": "youtube", "ingested_after": 1700000000}; `collections`
+        names the knowledge bases to answer from.
+        """
+        with profiled("ask-prepare"), metrics.span("ask_prepare", use_case=use_case):
+            response, prompt, cache_entry = self._prepare(
+                query, use_case, k, model_name, filters=filters, collections=collections
+            )
+        if response is not None:
+            yield response
+            return
+        parts = []
+        for part in stream_gemini(prompt, model_name=model_name, timings=timings):
+            parts.append(part)
+            yield part
+        self._remember(cache_entry, "".join(parts))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_query_service():
+    """Module-level QueryService shared by the CLI and other in-process callers."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = QueryService()
+    return _service
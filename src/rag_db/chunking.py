@@ -1,9 +1,23 @@
-
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import re
+from langchain_core.documents import Document
 # from constants import CHUNK_SIZE, CHUNK_OVERLAP
-from src.constants import CHUNK_SIZE, CHUNK_OVERLAP
+from src.constants import (
+    CHUNK_OVERLAP,
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_SIZE,
+    CHUNK_TOKENS,
+    EMBEDDING_MAX_TOKENS,
+    EMBEDDING_MODEL,
+    TRANSCRIPT_WINDOW_SECONDS,
+)
+from src.utils import format_timestamp
+
+WORD_RE = re.compile(r"\S+")
+
+
 class TextChunker:
     def __init__(self, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size, chunk_overlap=chunk_overlap
         )
@@ -16,5 +30,217 @@ class TextChunker:
         else:
             # It's already a string
             return self.text_splitter.split_text(document)
-        
 
+    def get_page_chunks(self, pages):
+        """Lazily chunk (page_number, text) pairs into Documents tagged with their page."""
+        for page_number, text in pages:
+            metadata = {"page": page_number} if page_number is not None else {}
+            for chunk in self.text_splitter.split_text(text):
+                yield Document(page_content=chunk, metadata=dict(metadata))
+
+
+def load_tokenizer(model_name=EMBEDDING_MODEL):
+    """The embedding model's fast (Rust) tokenizer, without truncation or padding."""
+    from tokenizers import Tokenizer
+    tokenizer = Tokenizer.from_pretrained(model_name)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+class StreamingChunker:
+    """Token-aware chunker over a stream of text blocks.
+
+    Text is tokenized with the embedding model's own tokenizer, one distinct
+    word at a time (each word's tokens are cached), and chunks of at most `chunk_tokens` tokens are cut at the last
+    sentence or paragraph end in their second half, else at the last word
+    boundary, so no chunk is truncated by the model. Consecutive chunks share
+    about `overlap_tokens` tokens. Only the unfinished tail of a block is kept
+    between blocks, so memory stays flat however long the input is.
+
+    Each chunk records its `start_offset` / `end_offset` (characters into the
+    source file) and, for paged files, its `page`.
+    """
+
+    def __init__(self, tokenizer=None, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS,
+                 max_tokens=EMBEDDING_MAX_TOKENS - 2, word_cache_size=1 << 17):
+        if chunk_tokens > max_tokens:
+            raise ValueError(f"chunk_tokens={chunk_tokens} exceeds the model's {max_tokens}-token window")
+        if not 0 <= overlap_tokens < chunk_tokens // 2:
+            raise ValueError("overlap_tokens must be less than half of chunk_tokens")
+        self._tokenizer = tokenizer
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        # Token offsets within the word, per distinct whitespace-separated word.
+        self.word_cache_size = word_cache_size
+        self._word_offsets = {}
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = load_tokenizer()
+        return self._tokenizer
+
+    def count_tokens(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def _boundary(self, text, offsets, start, end):
+        # Cut before token `t` for t in (start + chunk/2, end]; a gap between
+        # tokens means a word boundary, and subword pieces have none.
+        fallback = None
+        for t in range(end, start + self.chunk_tokens // 2, -1):
+            gap_start, gap_end = offsets[t - 1][1], offsets[t][0]
+            if gap_start == gap_end:
+                continue
+            if "\n" in text[gap_start:gap_end] or text[gap_start - 1] in ".!?":
+                return t
+            if fallback is None:
+                fallback = t
+        return fallback or end
+
+    def _word_pieces(self, words):
+        """The token offsets of each distinct word, encoding only words not seen before."""
+        # Grab the dict once: eviction swaps in a new one rather than clearing
+        # this one under another chunk worker.
+        cache = self._word_offsets
+        missing = list({word for word in words if word not in cache})
+        if missing:
+            if len(cache) + len(missing) > self.word_cache_size:
+                cache = self._word_offsets = {}
+            encodings = self.tokenizer.encode_batch(missing, add_special_tokens=False)
+            for word, encoding in zip(missing, encodings):
+                cache[word] = encoding.offsets
+        return cache
+
+    def _token_offsets(self, text):
+        # WordPiece pre-tokenizes on whitespace, so encoding each
+        # whitespace-separated word on its own gives the same tokens as
+        # encoding `text` whole. Transcripts reuse a small vocabulary, so
+        # most words are looked up rather than tokenized again.
+        matches = list(WORD_RE.finditer(text))
+        pieces = self._word_pieces([match.group() for match in matches])
+        return [
+            (start + token_start, start + token_end)
+            for match in matches
+            for start in (match.start(),)
+            for token_start, token_end in pieces[match.group()]
+        ]
+
+    def _split(self, text, final):
+        """(start, end) character spans of the chunks in `text`, and where its unconsumed tail starts."""
+        offsets = self._token_offsets(text)
+        n = len(offsets)
+        spans = []
+        i = 0
+        while i < n:
+            end = i + self.chunk_tokens
+            if end >= n:
+                if not final:
+                    # The tail may continue in the next block.
+                    break
+                spans.append((offsets[i][0], offsets[-1][1]))
+                i = n
+                break
+            cut = self._boundary(text, offsets, i, end)
+            spans.append((offsets[i][0], offsets[cut - 1][1]))
+            # Start the overlap on a word so re-tokenizing the tail is stable.
+            i = max(i + 1, cut - self.overlap_tokens)
+            while i < cut and offsets[i][0] == offsets[i - 1][1]:
+                i += 1
+        return spans, (offsets[i][0] if i < n else len(text))
+
+    def split_blocks(self, blocks, buffer_chars=1 << 18):
+        """Lazily chunk (page_number, offset, text) blocks, e.g. from `iter_text_blocks`."""
+        buffer, buffer_offset, page = "", 0, None
+        for page_number, offset, text in blocks:
+            if buffer and page_number != page:
+                yield from self._emit(buffer, buffer_offset, page, final=True)
+                buffer = ""
+            if not buffer:
+                buffer_offset = offset
+            buffer += text
+            page = page_number
+            if len(buffer) >= buffer_chars:
+                rest = yield from self._emit(buffer, buffer_offset, page, final=False)
+                buffer, buffer_offset = buffer[rest:], buffer_offset + rest
+        if buffer:
+            yield from self._emit(buffer, buffer_offset, page, final=True)
+
+    def _emit(self, text, text_offset, page, final):
+        spans, rest = self._split(text, final)
+        for start, end in spans:
+            metadata = {"page": page} if page is not None else {}
+            metadata.update(start_offset=text_offset + start, end_offset=text_offset + end)
+            yield Document(page_content=text[start:end], metadata=metadata)
+        return rest
+
+    def _counted_segments(self, segments, batch_size):
+        batch = []
+        for segment in segments:
+            batch.append(segment)
+            if len(batch) >= batch_size:
+                yield from self._count_batch(batch)
+                batch = []
+        yield from self._count_batch(batch)
+
+    def _count_batch(self, batch):
+        if not batch:
+            return
+        words = [WORD_RE.findall(segment[3]) for segment in batch]
+        pieces = self._word_pieces([word for segment_words in words for word in segment_words])
+        for segment, segment_words in zip(batch, words):
+            yield (*segment, sum(len(pieces[word]) for word in segment_words))
+
+    @staticmethod
+    def _timing(first, last):
+        return {
+            "start_time": round(first[1], 2),
+            "end_time": round(last[1] + last[2], 2),
+            "timestamp": format_timestamp(first[1]),
+        }
+
+    def _segments_document(self, window):
+        first, last = window[0], window[-1]
+        return Document(
+            page_content=" ".join(segment[3] for segment in window),
+            metadata={"start_offset": first[0], "end_offset": last[0] + len(last[3]), **self._timing(first, last)},
+        )
+
+    def split_segments(self, segments, window_seconds=TRANSCRIPT_WINDOW_SECONDS, batch_size=256):
+        """Lazily chunk timed transcript segments, e.g. from `iter_transcript_segments`.
+
+        `segments` are (offset, start, duration, text). Whole segments are
+        grouped until the next one would exceed `chunk_tokens` or stretch the
+        chunk past `window_seconds`; the last segments of a chunk, up to
+        `overlap_tokens`, also open the next one. Chunks carry `start_time` /
+        `end_time` in seconds and a `timestamp` such as "12:34" for citations.
+        A single segment longer than `chunk_tokens` is split like plain text.
+        """
+        window, window_tokens = [], 0
+        for segment in self._counted_segments(segments, batch_size):
+            offset, start, duration, text, tokens = segment
+            if window and (window_tokens + tokens > self.chunk_tokens
+                           or start + duration - window[0][1] > window_seconds):
+                yield self._segments_document(window)
+                # Never carry the whole window over, so every chunk moves forward.
+                kept, kept_tokens = [], 0
+                for previous in reversed(window[1:]):
+                    if kept_tokens + previous[4] > self.overlap_tokens:
+                        break
+                    kept.insert(0, previous)
+                    kept_tokens += previous[4]
+                window, window_tokens = kept, kept_tokens
+                if window_tokens + tokens > self.chunk_tokens:
+                    window, window_tokens = [], 0
+            if tokens > self.chunk_tokens:
+                for doc in self.split_blocks([(None, offset, text)]):
+                    doc.metadata.update(self._timing(segment, segment))
+                    yield doc
+                continue
+            window.append(segment)
+            window_tokens += tokens
+        if window:
+            yield self._segments_document(window)
+
+    def split_text(self, text):
+        return [doc.page_content for doc in self.split_blocks([(None, 0, text)])]
@@ -1,5 +1,169 @@
-from src.constants import EMBEDDING_MODEL
-from langchain_huggingface import HuggingFaceEmbeddings
+import threading
+import zlib
+from collections import OrderedDict
+import logging
+import numpy as np
+from src.constants import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MODEL,
+    EMBEDDING_ONNX_INT8_FILE,
+    EMBEDDING_THREADS,
+    QUERY_EMBEDDING_CACHE_SIZE,
+)
+from langchain_core.embeddings import Embeddings
+from src.metrics import metrics
+from src.rag_db.embedding_cache import EmbeddingCache
+from src.rag_db.sparse_index import tokenize
+from src.utils import hash_text
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps a LangChain embedding model with a persistent chunk cache and a query LRU.
+
+    Document vectors are looked up by `hash_text` in the model's EmbeddingCache,
+    so only text the model has never seen is encoded; query vectors are kept
+    in a bounded in-memory LRU.
+    """
+
+    def __init__(self, model, cache, query_cache_size=QUERY_EMBEDDING_CACHE_SIZE):
+        self.model = model
+        self.cache = cache
+        self.query_cache_size = query_cache_size
+        self._queries = OrderedDict()
+        self._query_lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        hashes = [hash_text(text) for text in texts]
+        vectors = self.cache.get_many(hashes)
+        missing = {h: text for h, text in zip(hashes, texts) if h not in vectors}
+        metrics.inc("embedding_cache_requests_total", len(hashes) - len(missing), cache="documents", result="hit")
+        metrics.inc("embedding_cache_requests_total", len(missing), cache="documents", result="miss")
+        if missing:
+            with metrics.span("embed", kind="documents"):
+                computed = self.model.embed_documents(list(missing.values()))
+            metrics.inc("embedded_texts_total", len(missing), kind="documents")
+            self.cache.put_many(list(missing), computed)
+            vectors.update(zip(missing, computed))
+        return [list(map(float, vectors[h])) for h in hashes]
+
+    def embed_queries(self, texts):
+        """Embed several queries with one model call for the LRU misses."""
+        with self._query_lock:
+            vectors = {text: self._queries[text] for text in texts if text in self._queries}
+        missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+        metrics.inc("embedding_cache_requests_total", len(texts) - len(missing), cache="queries", result="hit")
+        metrics.inc("embedding_cache_requests_total", len(missing), cache="queries", result="miss")
+        if missing:
+            with metrics.span("embed", kind="queries"):
+                computed = self.model.embed_documents(missing)
+            metrics.inc("embedded_texts_total", len(missing), kind="queries")
+            with self._query_lock:
+                for text, vector in zip(missing, computed):
+                    self._queries[text] = vector
+                while len(self._queries) > self.query_cache_size:
+                    self._queries.popitem(last=False)
+            vectors.update(zip(missing, computed))
+        return [vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        with self._query_lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                metrics.inc("embedding_cache_requests_total", cache="queries", result="hit")
+                return self._queries[text]
+        metrics.inc("embedding_cache_requests_total", cache="queries", result="miss")
+        with metrics.span("embed", kind="queries"):
+            vector = self.model.embed_query(text)
+        metrics.inc("embedded_texts_total", kind="queries")
+        with self._query_lock:
+            self._queries[text] = vector
+            if len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+        return vector
+
+
+class HashingEmbeddings(Embeddings):
+    """Model-free stand-in embeddings: signed feature hashing of token counts.
+
+    Texts sharing words get similar vectors, which is enough to exercise
+    ingestion and retrieval end to end without downloading a model, the way
+    the stub LLM stands in for Gemini. There is no semantic matching.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 1 << 31 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8", "hash")
+
 class Embedder:
-    def __init__(self, model_name=EMBEDDING_MODEL):
-        self.model = HuggingFaceEmbeddings(model_name=model_name)
\ No newline at end of file
+    def __init__(self, model_name=EMBEDDING_MODEL, use_cache=True, backend=EMBEDDING_BACKEND,
+                 batch_size=EMBEDDING_BATCH_SIZE, num_threads=EMBEDDING_THREADS):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self._dimension = None
+
+        if backend == "hash":
+            self.model = HashingEmbeddings()
+            self._dimension = self.model.dim
+            logging.info("Using model-free hashing embeddings")
+            if use_cache:
+                self.model = CachedEmbeddings(self.model, EmbeddingCache(f"{model_name}-{backend}"))
+            return
+
+        # Imported here: sentence-transformers pulls in torch and transformers.
+        from langchain_huggingface import HuggingFaceEmbeddings
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+
+        model_kwargs = {"device": "cpu"} if backend != "torch" else {}
+        if backend != "torch":
+            # sentence-transformers runs these through ONNX Runtime on CPU.
+            model_kwargs["backend"] = "onnx"
+        if backend == "onnx-int8":
+            model_kwargs["model_kwargs"] = {"file_name": EMBEDDING_ONNX_INT8_FILE}
+
+        self.model = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs=model_kwargs,
+            encode_kwargs={"batch_size": batch_size},
+        )
+        logging.info(f"Loaded {model_name} ({backend}, batch size {batch_size})")
+        if use_cache:
+            # Keyed by backend too: int8 vectors differ slightly from float ones.
+            self.model = CachedEmbeddings(self.model, EmbeddingCache(f"{model_name}-{backend}"))
+
+    @property
+    def dimension(self):
+        """Length of the vectors this embedder produces, i.e. the collection's vector size."""
+        if self._dimension is None:
+            self._dimension = len(self.model.embed_query("dimension"))
+        return self._dimension
+
+
+_embedders = {}
+
+def get_embedder(model_name=EMBEDDING_MODEL):
+    """Process-wide Embedder per model, so the model weights load only once."""
+    if model_name not in _embedders:
+        _embedders[model_name] = Embedder(model_name)
+    return _embedders[model_name]
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from src.constants import CACHE_DIR_NAME
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, one writer at a time
+    fcntl = None
+
+
+class EmbeddingCache:
+    """On-disk, content-addressed embedding store for one embedding model.
+
+    Vectors are appended as raw float32 rows to `vectors.f32` and read back
+    through a memory map; each `index.txt` line maps a chunk hash to its row
+    number. Rows are numbered from the vector file's actual size under a file
+    lock, so concurrent writers and rows orphaned by a crash (vector written,
+    index line not) never shift later rows onto the wrong hashes. A crash
+    mid-write at worst loses the last rows, which are recomputed on the next
+    miss.
+    """
+
+    def __init__(self, model_name, cache_dir=os.path.join(CACHE_DIR_NAME, "embeddings")):
+        self.model_name = model_name
+        self.dir = Path(cache_dir) / re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.vectors_path = self.dir / "vectors.f32"
+        self.index_path = self.dir / "index.txt"
+        self.meta_path = self.dir / "meta.json"
+        self.lock_path = self.dir / "lock"
+        self.dim = None
+        self._rows = {}
+        # Rows the vector file is known to hold; the memory map covers these.
+        self._stored_rows = 0
+        self._mmap = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.meta_path.exists():
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        if not self.vectors_path.exists() or not self.index_path.exists():
+            return
+        stored_rows = self.vectors_path.stat().st_size // (self.dim * 4)
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if not line.endswith("\n") or len(parts) != 2:
+                    continue  # torn last line
+                try:
+                    row = int(parts[1])
+                except ValueError:
+                    continue
+                if row < stored_rows:
+                    self._rows[parts[0]] = row
+        self._stored_rows = stored_rows
+        logging.info(f"Loaded {len(self._rows)} cached embeddings for {self.model_name}")
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _vectors(self):
+        # Remap only when rows were appended since the last map.
+        if self._mmap is None or self._mmap.shape[0] < self._stored_rows:
+            self._mmap = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(self._stored_rows, self.dim)
+            )
+        return self._mmap
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the cache files across processes."""
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_many(self, hashes):
+        """Return {hash: vector} for the hashes that are cached."""
+        with self._lock:
+            found = [(h, self._rows[h]) for h in hashes if h in self._rows]
+            if not found:
+                return {}
+            vectors = self._vectors()
+            return {h: np.array(vectors[row]) for h, row in found}
+
+    def put_many(self, hashes, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self.dir.mkdir(parents=True, exist_ok=True)
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+            new_rows = {}
+            for h, vector in zip(hashes, vectors):
+                if h not in self._rows:
+                    new_rows.setdefault(h, vector)
+            if not new_rows:
+                return
+            row_bytes = self.dim * 4
+            with self._file_lock():
+                with open(self.vectors_path, "ab") as f:
+                    size = f.seek(0, os.SEEK_END)
+                    if size % row_bytes:
+                        # A writer died mid-row; drop the partial row.
+                        size -= size % row_bytes
+                        f.truncate(size)
+                    first_row = size // row_bytes
+                    f.write(np.stack(list(new_rows.values())).tobytes())
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    f.writelines(f"{h} {first_row + i}\n" for i, h in enumerate(new_rows))
+            for i, h in enumerate(new_rows):
+                self._rows[h] = first_row + i
+            self._stored_rows = first_row + len(new_rows)
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+import numpy as np
+from src.constants import RERANK_BATCH_SIZE, RERANK_BUDGET_MS, RERANKER_MODEL
+from src.metrics import metrics
+
+
+class CrossEncoderReranker:
+    """Rescores (query, chunk) pairs with a small cross-encoder under a latency budget.
+
+    Candidates are scored in batches in their retrieval order; once the budget
+    is spent, the remaining candidates keep their retrieval order after the
+    scored ones instead of waiting for the model.
+    """
+
+    def __init__(self, model_name=RERANKER_MODEL, batch_size=RERANK_BATCH_SIZE, budget_ms=RERANK_BUDGET_MS):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+                    logging.info(f"Loaded reranker {self.model_name}")
+        return self._model
+
+    def rerank(self, query, docs):
+        """Return (docs, scores): reranked docs and a relevance in [0, 1] for each."""
+        if not docs:
+            return [], []
+        start = time.perf_counter()
+        scores = []
+        for offset in range(0, len(docs), self.batch_size):
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if scores and elapsed_ms > self.budget_ms:
+                logging.info(
+                    f"Rerank budget of {self.budget_ms} ms spent after {len(scores)}/{len(docs)} candidates"
+                )
+                break
+            batch = docs[offset:offset + self.batch_size]
+            with metrics.span("rerank_batch"):
+                scores.extend(self.model.predict([(query, doc.page_content) for doc in batch]))
+        metrics.inc("rerank_candidates_total", len(scores), result="scored")
+        metrics.inc("rerank_candidates_total", len(docs) - len(scores), result="over_budget")
+
+        relevance = 1 / (1 + np.exp(-np.asarray(scores, dtype=np.float32)))
+        order = sorted(range(len(scores)), key=lambda i: relevance[i], reverse=True)
+        ranked = [docs[i] for i in order]
+        ranked_scores = [float(relevance[i]) for i in order]
+        # Unscored tail: keep retrieval order, ranked below every scored candidate.
+        floor = min(ranked_scores)
+        for i, doc in enumerate(docs[len(scores):]):
+            ranked.append(doc)
+            ranked_scores.append(floor * (1 - (i + 1) / (len(docs) + 1)))
+        return ranked, ranked_scores
+
+
+def mmr_select(relevance, doc_vectors, k, lambda_mult=0.7):
+    """Maximal marginal relevance: pick k indices trading relevance against redundancy.
+
+    `relevance` holds one score per document (higher is better); `doc_vectors`
+    are their embeddings, compared by cosine similarity.
+    """
+    if not len(relevance):
+        return []
+    vectors = np.asarray(doc_vectors, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    similarity = vectors @ vectors.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected = [int(np.argmax(relevance))]
+    while len(selected) < min(k, len(relevance)):
+        redundancy = similarity[:, selected].max(axis=1)
+        mmr = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        mmr[selected] = -np.inf
+        selected.append(int(np.argmax(mmr)))
+    return selected
+
+
+_rerankers = {}
+
+def get_reranker(model_name=RERANKER_MODEL):
+    if model_name not in _rerankers:
+        _rerankers[model_name] = CrossEncoderReranker(model_name)
+    return _rerankers[model_name]
@@ -0,0 +1,237 @@
+import heapq
+import logging
+import math
+import os
+import pickle
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from src.constants import CACHE_DIR_NAME
+
+# Keeps identifiers like `snake_case`, `torch.nn` and `all-MiniLM-L6-v2` whole.
+TOKEN_RE = re.compile(r"[a-z0-9_]+(?:[.\-][a-z0-9_]+)*")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class _ImpactList:
+    """The `limit` highest weighted postings of one term, updated in place.
+
+    `weights` maps doc ID -> weight; `heap` is a min-heap over the same
+    entries (plus lazily discarded ones) so the weakest can be evicted.
+    Weights are computed against `avg_length`, the average document length
+    when the list was built.
+    """
+
+    def __init__(self, limit, avg_length, scored):
+        self.limit = limit
+        self.avg_length = avg_length
+        self.weights = dict(scored)
+        self.heap = [(weight, doc_id) for doc_id, weight in self.weights.items()]
+        heapq.heapify(self.heap)
+        # Listed postings removed while unlisted ones remained: their
+        # replacements are unknown until the list is rebuilt.
+        self.missing = 0
+
+    def _weakest(self):
+        while self.heap and self.weights.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0]
+
+    def offer(self, doc_id, weight):
+        if len(self.weights) >= self.limit:
+            if weight <= self._weakest()[0]:
+                return
+            del self.weights[heapq.heappop(self.heap)[1]]
+        self.weights[doc_id] = weight
+        heapq.heappush(self.heap, (weight, doc_id))
+        if len(self.heap) > 2 * self.limit:
+            self.heap = [(weight, doc_id) for doc_id, weight in self.weights.items()]
+            heapq.heapify(self.heap)
+
+    def discard(self, doc_id, postings):
+        if self.weights.pop(doc_id, None) is not None and len(postings) > len(self.weights):
+            self.missing += 1
+
+
+class BM25Index:
+    """Incremental in-memory inverted index with Okapi BM25 scoring.
+
+    Documents are keyed by Qdrant point ID, so results can be fused with dense
+    hits directly. Posting lists are dicts, which makes add/remove O(terms in
+    the document).
+
+    To keep query latency bounded on large corpora, a term whose posting list
+    is longer than `impact_limit` is scored only over its `impact_limit` highest
+    weighted postings (impact-ordered pruning). Each queried term's weighted
+    postings are computed on first use and then kept current as documents are
+    added and removed; a list is rebuilt once the average document length has
+    drifted by more than `impact_drift`, or once more than a tenth of its top
+    postings were removed without a known replacement.
+    """
+
+    def __init__(self, path=None, k1=1.5, b=0.75, impact_limit=1000, impact_drift=0.1):
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self.impact_limit = impact_limit
+        self.impact_drift = impact_drift
+        self._impacts = {}
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        self.doc_terms = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+        self._dirty = False
+
+    @classmethod
+    def for_collection(cls, collection_name, cache_dir=os.path.join(CACHE_DIR_NAME, "bm25")):
+        index = cls(os.path.join(cache_dir, f"{collection_name}.pkl"))
+        index.load()
+        return index
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id, text):
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                return
+            tokens = tokenize(text)
+            counts = defaultdict(int)
+            for token in tokens:
+                counts[token] += 1
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+                impacts = self._impacts.get(term)
+                if impacts is not None:
+                    impacts.offer(doc_id, self._weight(tf, len(tokens), impacts.avg_length))
+            self.doc_lengths[doc_id] = len(tokens)
+            self.doc_terms[doc_id] = tuple(counts)
+            self.total_length += len(tokens)
+            self._dirty = True
+
+    def remove(self, doc_id):
+        with self._lock:
+            if doc_id not in self.doc_lengths:
+                return
+            for term in self.doc_terms.pop(doc_id):
+                postings = self.postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+                    self._impacts.pop(term, None)
+                elif term in self._impacts:
+                    self._impacts[term].discard(doc_id, postings)
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self.postings = defaultdict(dict)
+            self.doc_lengths = {}
+            self.doc_terms = {}
+            self.total_length = 0
+            self._impacts = {}
+            self._dirty = True
+
+    def _weight(self, tf, doc_length, avg_length):
+        return tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * doc_length / avg_length))
+
+    def _scored_postings(self, term, avg_length):
+        impacts = self._impacts.get(term)
+        if (
+            impacts is None
+            or abs(avg_length - impacts.avg_length) > self.impact_drift * impacts.avg_length
+            or impacts.missing > self.impact_limit // 10
+        ):
+            postings = self.postings[term]
+            scored = ((doc_id, self._weight(tf, self.doc_lengths[doc_id], avg_length))
+                      for doc_id, tf in postings.items())
+            if len(postings) > self.impact_limit:
+                scored = heapq.nlargest(self.impact_limit, scored, key=lambda item: item[1])
+            impacts = self._impacts[term] = _ImpactList(self.impact_limit, avg_length, scored)
+        return impacts.weights.items()
+
+    def search(self, query, k=5, candidates=None):
+        """Return up to k (doc_id, score) pairs, best first.
+
+        With `candidates` (a set of doc IDs), only those are scored, exactly (no pruning).
+        """
+        with self._lock:
+            n = len(self.doc_lengths)
+            if not n:
+                return []
+            avg_length = self.total_length / n
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                if term not in self.postings:
+                    continue
+                postings = self.postings[term]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                if candidates is None:
+                    scored = self._scored_postings(term, avg_length)
+                else:
+                    # Walk whichever side is shorter: the candidates or the term's postings.
+                    matched = (
+                        (doc_id for doc_id in candidates if doc_id in postings)
+                        if len(candidates) < len(postings)
+                        else (doc_id for doc_id in postings if doc_id in candidates)
+                    )
+                    scored = (
+                        (doc_id, self._weight(postings[doc_id], self.doc_lengths[doc_id], avg_length))
+                        for doc_id in matched
+                    )
+                for doc_id, weight in scored:
+                    scores[doc_id] += idf * weight
+            return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logging.warning(f"Ignoring unreadable BM25 index {self.path}: {e}")
+            return
+        with self._lock:
+            self.postings = defaultdict(dict, state["postings"])
+            self.doc_lengths = state["doc_lengths"]
+            self.doc_terms = state["doc_terms"]
+            self.total_length = state["total_length"]
+            self._impacts = {}
+            self._dirty = False
+        logging.info(f"Loaded BM25 index with {len(self)} documents from {self.path}")
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with self._lock:
+            state = {
+                "postings": dict(self.postings),
+                "doc_lengths": self.doc_lengths,
+                "doc_terms": self.doc_terms,
+                "total_length": self.total_length,
+            }
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._dirty = False
+        os.replace(tmp_path, self.path)
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked ID lists; returns (id, score) pairs sorted by fused score."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
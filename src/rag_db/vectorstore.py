@@ -1,17 +1,228 @@
+import json
 import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    FieldCondition,
+    Filter,
+    HasIdCondition,
+    HnswConfigDiff,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    QuantizationSearchParams,
+    Range,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 from langchain_core.documents import Document
 from langchain_qdrant import QdrantVectorStore
-from src.constants import QDRANT_HOST, COLLECTION_NAME
-from src.utils import hash_text
+from src.constants import (
+    COLLECTION_NAME,
+    EMBEDDING_BATCH_SIZE,
+    HYBRID_FETCH_FACTOR,
+    QDRANT_BACKEND,
+    QDRANT_HNSW_EF,
+    QDRANT_HNSW_EF_CONSTRUCT,
+    QDRANT_HNSW_M,
+    QDRANT_HOST,
+    QDRANT_LOCAL_PATH,
+    QDRANT_ON_DISK_PAYLOAD,
+    QDRANT_ON_DISK_VECTORS,
+    QDRANT_OVERSAMPLING,
+    QDRANT_PORT,
+    QDRANT_QUANTIZATION,
+    QDRANT_RESCORE,
+    RETRIEVAL_MODE,
+    RETRIEVAL_MODES,
+)
+from src.config import check_collection_name
+from src.metrics import metrics
+from src.rag_db.embedding import get_embedder
+from src.rag_db.sparse_index import BM25Index, reciprocal_rank_fusion
+from src.utils import hash_text, hash_to_point_id
+
+# Max point IDs per `retrieve` call when checking which chunks already exist.
+LOOKUP_BATCH_SIZE = 1000
+
+# Chunk metadata fields that get a payload index and can be filtered on.
+PAYLOAD_INDEXES = {
+    "source": PayloadSchemaType.KEYWORD,
+    "extractor": PayloadSchemaType.KEYWORD,
+    "document_id": PayloadSchemaType.KEYWORD,
+    "page": PayloadSchemaType.INTEGER,
+    "ingested_at": PayloadSchemaType.FLOAT,
+}
+# A filtered BM25 query scores every matching chunk exactly when at most this
+# many match; beyond that it over-fetches unfiltered hits and keeps the matches.
+SPARSE_FILTER_EXACT_LIMIT = 10000
+# Matching point IDs are cached for this many distinct filters per collection,
+# for at most this long (another process may ingest into the same collection).
+SPARSE_FILTER_CACHE_SIZE = 64
+SPARSE_FILTER_CACHE_TTL_SECONDS = 300
+
+
+def build_filter(filters):
+    """Turn a filter dict into a Qdrant Filter over chunk metadata.
+
+    Keys are PAYLOAD_INDEXES fields matched by value (a list matches any of
+    its values), plus `ingested_after` / `ingested_before` as epoch seconds.
+    Returns None for an empty filter.
+    """
+    if not filters:
+        return None
+    conditions = []
+    for name, value in filters.items():
+        if name in ("ingested_after", "ingested_before"):
+            bound = "gte" if name == "ingested_after" else "lte"
+            conditions.append(FieldCondition(key="metadata.ingested_at", range=Range(**{bound: float(value)})))
+        elif name in PAYLOAD_INDEXES:
+            match = MatchAny(any=list(value)) if isinstance(value, (list, tuple, set)) else MatchValue(value=value)
+            conditions.append(FieldCondition(key=f"metadata.{name}", match=match))
+        else:
+            raise ValueError(f"Cannot filter on {name!r}; expected one of "
+                             f"{[*PAYLOAD_INDEXES, 'ingested_after', 'ingested_before']}")
+    return Filter(must=conditions)
+
+
+QUANTIZATION_MODES = ("int8", "binary")
+
+
+@dataclass
+class CollectionConfig:
+    """How a collection stores and searches its vectors; defaults come from the QDRANT_* constants.
+
+    Storage settings (quantization, on-disk, HNSW m / ef_construct) apply when
+    the collection is created; the search settings on every dense query.
+    """
+    quantization: Optional[str] = QDRANT_QUANTIZATION
+    rescore: bool = QDRANT_RESCORE
+    oversampling: float = QDRANT_OVERSAMPLING
+    on_disk_vectors: bool = QDRANT_ON_DISK_VECTORS
+    on_disk_payload: bool = QDRANT_ON_DISK_PAYLOAD
+    hnsw_m: int = QDRANT_HNSW_M
+    hnsw_ef_construct: int = QDRANT_HNSW_EF_CONSTRUCT
+    hnsw_ef: Optional[int] = QDRANT_HNSW_EF
+
+    def __post_init__(self):
+        if self.quantization not in (None, *QUANTIZATION_MODES):
+            raise ValueError(f"Unknown quantization {self.quantization!r}; expected None or one of {QUANTIZATION_MODES}")
+
+    def collection_params(self, size):
+        """Keyword arguments for `create_collection` with `size`-dimensional vectors."""
+        quantization = None
+        if self.quantization == "int8":
+            # Clip the outer 1% of values so outliers don't waste the 256 levels.
+            quantization = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        elif self.quantization == "binary":
+            quantization = BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return {
+            "vectors_config": VectorParams(size=size, distance=Distance.COSINE, on_disk=self.on_disk_vectors),
+            "hnsw_config": HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct),
+            "quantization_config": quantization,
+            "on_disk_payload": self.on_disk_payload,
+        }
+
+    def search_params(self):
+        """SearchParams for dense queries, or None where Qdrant's defaults apply."""
+        if self.quantization is None and self.hnsw_ef is None:
+            return None
+        quantization = None
+        if self.quantization is not None:
+            quantization = QuantizationSearchParams(
+                rescore=self.rescore, oversampling=self.oversampling if self.rescore else None
+            )
+        return SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+
+# Each backend builds a QdrantClient; the embedded ones expose the same API as
+# the server, so everything above the client is backend-agnostic.
+CLIENT_FACTORIES = {
+    "server": lambda host, port, path: QdrantClient(host=host, port=port),
+    "local": lambda host, port, path: QdrantClient(path=path),
+    "memory": lambda host, port, path: QdrantClient(location=":memory:"),
+}
+
+class InstrumentedClient:
+    """Transparent QdrantClient proxy that times every call as a Qdrant round trip.
+
+    Wraps LangChain's calls as well as ours, so `qdrant_request_seconds{op=...}`
+    counts every request the process makes.
+    """
+
+    def __init__(self, client, backend):
+        self._client = client
+        self._backend = backend
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        if name not in self._wrapped:
+            def call(*args, **kwargs):
+                with metrics.span("qdrant_request", op=name, backend=self._backend):
+                    return attr(*args, **kwargs)
+            self._wrapped[name] = call
+        return self._wrapped[name]
+
+
+_clients = {}
+
+def get_client(backend=QDRANT_BACKEND, host=QDRANT_HOST, port=QDRANT_PORT, path=QDRANT_LOCAL_PATH):
+    """Process-wide QdrantClient per backend/endpoint.
+
+    Caching matters beyond connection reuse: an on-disk local store can only be
+    opened by one client per process.
+    """
+    if backend not in CLIENT_FACTORIES:
+        raise ValueError(f"Unknown Qdrant backend {backend!r}; expected one of {list(CLIENT_FACTORIES)}")
+    key = (backend, host, port) if backend == "server" else (backend, path)
+    if key not in _clients:
+        _clients[key] = InstrumentedClient(CLIENT_FACTORIES[backend](host, port, path), backend)
+        location = f"{host}:{port}" if backend == "server" else (path if backend == "local" else ":memory:")
+        logging.info(f"Connected to Qdrant ({backend}) at {location}")
+    return _clients[key]
+
 
 class VectorStoreManager:
-    def __init__(self, embedder, host=QDRANT_HOST, port=6333, collection_name=COLLECTION_NAME):
-        self.collection_name = collection_name
-        self.client = QdrantClient(host=host, port=port)
+    # Chunk hashes known to be stored, per (client, collection). Shared across
+    # instances so repeated ingestion runs in the same process skip the lookup.
+    _known_hashes = {}
+    # BM25 index over the same points, per (client, collection).
+    _sparse_indexes = {}
+    # Filter key -> (cached at, matching point IDs or None when the filter is too
+    # broad to score exactly), per (client, collection). Dropped on every write.
+    _filter_candidates = {}
+    _filter_candidates_lock = threading.Lock()
 
-        logging.info(f"Connected to Qdrant at {host}:{port}")
+    def __init__(self, embedder, host=QDRANT_HOST, port=QDRANT_PORT, collection_name=COLLECTION_NAME,
+                 backend=QDRANT_BACKEND, path=QDRANT_LOCAL_PATH, config=None):
+        self.collection_name = collection_name
+        self.backend = backend
+        self.client = get_client(backend, host, port, path)
+        self.embedder = embedder
+        self.embed_batch_size = getattr(embedder, "batch_size", EMBEDDING_BATCH_SIZE)
+        self.config = config or CollectionConfig()
+        # Embedded Qdrant always searches exactly and warns about search params.
+        self._search_params = self.config.search_params() if backend == "server" else None
+        # Clients are process-wide singletons, so their identity is a stable key.
+        self._hashes_key = (id(self.client), collection_name)
         self._ensure_collection()
 
         self.vectorstore = QdrantVectorStore(
@@ -27,22 +238,148 @@ class VectorStoreManager:
             self._create_collection()
         else:
             logging.info(f"Collection {self.collection_name} already exists")
+            self._create_payload_indexes()
 
     def _create_collection(self):
+        self._known_hashes[self._hashes_key] = set()
         self.client.create_collection(
             collection_name=self.collection_name,
-            vectors_config=VectorParams(
-                size=384,  # You can replace with a constant like EMBEDDING_DIM
-                distance=Distance.COSINE
-            )
+            **self.config.collection_params(self.vector_size),
+        )
+        self._create_payload_indexes()
+        logging.info(
+            f"Collection {self.collection_name} created ({self.vector_size} dimensions, "
+            f"quantization {self.config.quantization or 'none'}, "
+            f"vectors {'on disk' if self.config.on_disk_vectors else 'in RAM'})"
         )
-        logging.info(f"Collection {self.collection_name} created")
+
+    @property
+    def vector_size(self):
+        size = getattr(self.embedder, "dimension", None)
+        if size is None:
+            size = len(self.embed_query("dimension"))
+        return size
+
+    def _create_payload_indexes(self):
+        # Embedded Qdrant scans payloads and has no payload indexes.
+        if self.backend != "server":
+            return
+        existing = self.client.get_collection(self.collection_name).payload_schema or {}
+        for name, schema in PAYLOAD_INDEXES.items():
+            field_name = f"metadata.{name}"
+            if field_name not in existing:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name, field_name=field_name, field_schema=schema
+                )
+                logging.info(f"Created {schema.value} payload index on {field_name}")
 
     def reset_collection(self):
         if self.client.collection_exists(self.collection_name):
             logging.info(f"Deleting existing collection: {self.collection_name}")
             self.client.delete_collection(self.collection_name)
         self._create_collection()
+        self._forget_filter_candidates()
+        if self._hashes_key in self._sparse_indexes:
+            self._sparse_indexes[self._hashes_key].clear()
+
+    @property
+    def sparse_index(self):
+        index = self._sparse_indexes.get(self._hashes_key)
+        if index is None:
+            # An in-memory collection dies with the process, so don't persist its index.
+            index = BM25Index() if self.backend == "memory" else BM25Index.for_collection(self.collection_name)
+            if len(index) != self.count():
+                self._rebuild_sparse_index(index)
+            self._sparse_indexes[self._hashes_key] = index
+        return index
+
+    def _rebuild_sparse_index(self, index):
+        logging.info(f"Rebuilding BM25 index for {self.collection_name} from stored chunks")
+        index.clear()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=LOOKUP_BATCH_SIZE,
+                offset=offset,
+                with_payload=["page_content"],
+                with_vectors=False,
+            )
+            for point in points:
+                index.add(str(point.id), point.payload.get("page_content", ""))
+            if offset is None:
+                break
+        index.save()
+
+    def save_sparse_index(self):
+        if self._hashes_key in self._sparse_indexes:
+            self._sparse_indexes[self._hashes_key].save()
+
+    def existing_point_ids(self, point_ids):
+        """The subset of `point_ids` stored in the collection."""
+        existing = set()
+        for start in range(0, len(point_ids), LOOKUP_BATCH_SIZE):
+            points = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=point_ids[start:start + LOOKUP_BATCH_SIZE],
+                with_payload=False,
+                with_vectors=False,
+            )
+            existing.update(str(point.id) for point in points)
+        return existing
+
+    def new_documents(self, chunks):
+        """The chunks not stored yet, as {point_id: Document} with their hash in the metadata."""
+        known_hashes = self._known_hashes.setdefault(self._hashes_key, set())
+        candidates = {}
+
+        for chunk in chunks:
+            if isinstance(chunk, Document):
+                content, metadata = chunk.page_content, chunk.metadata
+            else:
+                content, metadata = chunk, {}
+            chunk_hash = hash_text(content)
+            if chunk_hash in known_hashes:
+                continue
+            candidates.setdefault(hash_to_point_id(chunk_hash), Document(
+                page_content=content,
+                metadata={**metadata, "hash": chunk_hash}
+            ))
+
+        # One batched lookup for everything not already known in this process.
+        existing = self.existing_point_ids(list(candidates))
+        known_hashes.update(candidates[point_id].metadata["hash"] for point_id in existing)
+
+        new_docs = {
+            point_id: doc for point_id, doc in candidates.items() if point_id not in existing
+        }
+        skipped = len(chunks) - len(new_docs)
+        if skipped:
+            logging.info(f"Skipped {skipped} duplicate chunks")
+        return new_docs
+
+    def embed_documents(self, docs):
+        return self.embedder.model.embed_documents([doc.page_content for doc in docs])
+
+    def upsert(self, new_docs, vectors):
+        """Store embedded documents from `new_documents` and index them for BM25."""
+        # Same payload layout as QdrantVectorStore.add_documents, so LangChain reads them back.
+        points = [
+            PointStruct(
+                id=point_id,
+                vector={self.vectorstore.vector_name: vector},
+                payload={"page_content": doc.page_content, "metadata": doc.metadata},
+            )
+            for (point_id, doc), vector in zip(new_docs.items(), vectors)
+        ]
+        self.client.upsert(collection_name=self.collection_name, points=points)
+        self._forget_filter_candidates()
+        known_hashes = self._known_hashes.setdefault(self._hashes_key, set())
+        known_hashes.update(doc.metadata["hash"] for doc in new_docs.values())
+        sparse_index = self.sparse_index
+        for point_id, doc in new_docs.items():
+            sparse_index.add(point_id, doc.page_content)
+        return list(new_docs)
 
     def add(self, chunks):
         if not chunks:
@@ -50,36 +387,219 @@ class VectorStoreManager:
             return None
 
         logging.info(f"Adding {len(chunks)} chunks to vector store with deduplication")
+        new_docs = self.new_documents(chunks)
+        if not new_docs:
+            logging.info("No new documents to add (all were duplicates)")
+            return None
+        ids = []
+        items = list(new_docs.items())
+        for start in range(0, len(items), self.embed_batch_size):
+            batch = dict(items[start:start + self.embed_batch_size])
+            ids += self.upsert(batch, self.embed_documents(batch.values()))
+        return ids
 
-        new_docs = []
-
-        for chunk in chunks:
-            content = chunk.page_content if isinstance(chunk, Document) else chunk
-            chunk_hash = hash_text(content)
+    def delete(self, point_ids):
+        point_ids = list(point_ids)
+        if not point_ids:
+            return
+        logging.info(f"Deleting {len(point_ids)} stale points from {self.collection_name}")
+        for start in range(0, len(point_ids), LOOKUP_BATCH_SIZE):
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=point_ids[start:start + LOOKUP_BATCH_SIZE]),
+            )
+        self._forget_filter_candidates()
+        known_hashes = self._known_hashes.setdefault(self._hashes_key, set())
+        known_hashes.difference_update(uuid.UUID(point_id).hex for point_id in point_ids)
+        sparse_index = self.sparse_index
+        for point_id in point_ids:
+            sparse_index.remove(point_id)
 
-            existing = self.client.scroll(
+    def stored_metadata(self, point_ids):
+        """The chunk metadata of the given stored points, as {point_id: metadata}."""
+        point_ids = list(point_ids)
+        metadata = {}
+        for start in range(0, len(point_ids), LOOKUP_BATCH_SIZE):
+            points = self.client.retrieve(
                 collection_name=self.collection_name,
-                limit=1,
-                with_payload=True,
-                scroll_filter={
-                    "must": [{"key": "hash", "match": {"value": chunk_hash}}]
+                ids=point_ids[start:start + LOOKUP_BATCH_SIZE],
+                with_payload=["metadata"],
+                with_vectors=False,
+            )
+            metadata.update((str(point.id), point.payload.get("metadata") or {}) for point in points)
+        return metadata
+
+    def set_metadata(self, metadata_by_id):
+        """Replace the chunk metadata of stored points, leaving their text and vectors alone."""
+        for point_id, metadata in metadata_by_id.items():
+            self.client.set_payload(
+                collection_name=self.collection_name, payload={"metadata": metadata}, points=[point_id]
+            )
+        self._forget_filter_candidates()
+
+    def count(self):
+        return self.client.count(collection_name=self.collection_name, exact=True).count
+
+    def embed_query(self, query):
+        return self.embedder.model.embed_query(query)
+
+    def similarity_search(self, query, k=5, filters=None):
+        return self.vectorstore.similarity_search(
+            query, k=k, filter=build_filter(filters), search_params=self._search_params
+        )
+
+    def similarity_search_by_vector(self, vector, k=5, filters=None):
+        return self.vectorstore.similarity_search_by_vector(
+            vector, k=k, filter=build_filter(filters), search_params=self._search_params
+        )
+
+    def similarity_search_with_score_by_vector(self, vector, k=5, filters=None):
+        """Like `similarity_search_by_vector`, as (Document, cosine score) pairs."""
+        return self.vectorstore.similarity_search_with_score_by_vector(
+            vector, k=k, filter=build_filter(filters), search_params=self._search_params
+        )
+
+    def sources(self, limit=100):
+        """(source, chunk count) pairs for the documents in the collection."""
+        response = self.client.facet(
+            collection_name=self.collection_name, key="metadata.source", limit=limit, exact=True
+        )
+        return [(hit.value, hit.count) for hit in response.hits]
+
+    def _documents_for_ids(self, point_ids):
+        points = self.client.retrieve(
+            collection_name=self.collection_name, ids=point_ids, with_payload=True, with_vectors=False
+        )
+        by_id = {
+            str(point.id): Document(
+                page_content=point.payload.get("page_content", ""),
+                metadata={
+                    **(point.payload.get("metadata") or {}),
+                    "_id": str(point.id),
+                    "_collection_name": self.collection_name,
                 },
             )
+            for point in points
+        }
+        return [by_id[point_id] for point_id in point_ids if point_id in by_id]
 
-            if not existing[0]:  # No match, safe to insert
-                doc = Document(
-                    page_content=content,
-                    metadata={"hash": chunk_hash}
-                )
-                new_docs.append(doc)
-            else:
-                logging.info("Duplicate chunk detected — skipping insertion")
+    def _matching_point_ids(self, qdrant_filter, point_ids=None):
+        """IDs of points matching the filter, optionally only among `point_ids`."""
+        if point_ids is not None:
+            qdrant_filter = Filter(must=[qdrant_filter, HasIdCondition(has_id=list(point_ids))])
+        matching = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=qdrant_filter,
+                limit=LOOKUP_BATCH_SIZE,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            matching.update(str(point.id) for point in points)
+            if offset is None:
+                return matching
+
+    def _forget_filter_candidates(self):
+        with self._filter_candidates_lock:
+            self._filter_candidates.pop(self._hashes_key, None)
+
+    def _filter_candidates_for(self, filters, qdrant_filter):
+        """Point IDs matching `filters`, or None when more than SPARSE_FILTER_EXACT_LIMIT match."""
+        key = json.dumps(filters, sort_keys=True, default=str)
+        with self._filter_candidates_lock:
+            cache = self._filter_candidates.setdefault(self._hashes_key, OrderedDict())
+            entry = cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < SPARSE_FILTER_CACHE_TTL_SECONDS:
+                cache.move_to_end(key)
+                metrics.inc("sparse_filter_cache_requests_total", result="hit")
+                return entry[1]
+        metrics.inc("sparse_filter_cache_requests_total", result="miss")
+        matches = self.client.count(collection_name=self.collection_name, count_filter=qdrant_filter, exact=True).count
+        candidates = frozenset(self._matching_point_ids(qdrant_filter)) if matches <= SPARSE_FILTER_EXACT_LIMIT else None
+        with self._filter_candidates_lock:
+            # Don't cache the answer if a write dropped the cache while it was computed.
+            if self._filter_candidates.get(self._hashes_key) is cache:
+                cache[key] = (time.monotonic(), candidates)
+                while len(cache) > SPARSE_FILTER_CACHE_SIZE:
+                    cache.popitem(last=False)
+        return candidates
+
+    def _sparse_hits(self, query, k, filters=None):
+        with metrics.span("bm25_search", filtered=bool(filters)):
+            qdrant_filter = build_filter(filters)
+            if qdrant_filter is None:
+                return self.sparse_index.search(query, k=k)
+            candidates = self._filter_candidates_for(filters, qdrant_filter)
+            if candidates is not None:
+                # Selective filter: score exactly the chunks it lets through.
+                return self.sparse_index.search(query, k=k, candidates=candidates)
+            hits = self.sparse_index.search(query, k=k * HYBRID_FETCH_FACTOR)
+            allowed = self._matching_point_ids(qdrant_filter, [point_id for point_id, _ in hits])
+            return [hit for hit in hits if hit[0] in allowed][:k]
+
+    def sparse_search(self, query, k=5, filters=None):
+        hits = self._sparse_hits(query, k, filters)
+        return self._documents_for_ids([point_id for point_id, _ in hits])
+
+    def hybrid_search(self, query, k=5, query_vector=None, filters=None):
+        """Fuse dense and BM25 rankings with reciprocal-rank fusion."""
+        fetch_k = k * HYBRID_FETCH_FACTOR
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        dense = {
+            doc.metadata["_id"]: doc
+            for doc in self.similarity_search_by_vector(query_vector, k=fetch_k, filters=filters)
+        }
+        sparse = [point_id for point_id, _ in self._sparse_hits(query, fetch_k, filters)]
+        fused = [point_id for point_id, _ in reciprocal_rank_fusion([list(dense), sparse])[:k]]
+
+        docs = dict(dense)
+        docs.update(
+            (doc.metadata["_id"], doc)
+            for doc in self._documents_for_ids([point_id for point_id in fused if point_id not in dense])
+        )
+        return [docs[point_id] for point_id in fused if point_id in docs]
+
+    def search(self, query, k=5, mode=RETRIEVAL_MODE, query_vector=None, filters=None):
+        """Top-k chunks for `query`; `filters` restricts them by metadata (see build_filter)."""
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}")
+        with metrics.span("search", mode=mode):
+            return self._search(query, k, mode, query_vector, filters)
+
+    def _search(self, query, k, mode, query_vector, filters):
+        if mode == "sparse":
+            return self.sparse_search(query, k=k, filters=filters)
+        if mode == "hybrid":
+            return self.hybrid_search(query, k=k, query_vector=query_vector, filters=filters)
+        # mode == "dense"
+        if query_vector is not None:
+            return self.similarity_search_by_vector(query_vector, k=k, filters=filters)
+        return self.similarity_search(query, k=k, filters=filters)
+
+
+_vector_stores = {}
+_vector_stores_lock = threading.Lock()
+
+def get_vector_store(collection_name=COLLECTION_NAME, backend=QDRANT_BACKEND, create=True):
+    """Process-wide VectorStoreManager per collection, i.e. per knowledge base.
+
+    With `create=False` a collection that does not exist yet raises ValueError
+    instead of being created, so queries cannot conjure up empty knowledge bases.
+    """
+    check_collection_name(collection_name)
+    key = (backend, collection_name)
+    with _vector_stores_lock:
+        if key not in _vector_stores:
+            if not create and not get_client(backend).collection_exists(collection_name):
+                raise ValueError(f"Unknown knowledge base {collection_name!r}")
+            _vector_stores[key] = VectorStoreManager(get_embedder(), collection_name=collection_name, backend=backend)
+        return _vector_stores[key]
 
-        if new_docs:
-            return self.vectorstore.add_documents(new_docs)
-        else:
-            logging.info("No new documents to add (all were duplicates)")
-            return None
 
-    def similarity_search(self, query, k=5):
-        return self.vectorstore.similarity_search(query, k=k)
\ No newline at end of file
+def list_collections(backend=QDRANT_BACKEND):
+    """Names of the knowledge bases stored in Qdrant."""
+    return sorted(collection.name for collection in get_client(backend).get_collections().collections)
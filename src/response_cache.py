@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from src.metrics import metrics
+from src.constants import (
+    CACHE_DIR_NAME,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+
+
+class ResponseCache:
+    """Persistent cache of LLM responses in SQLite.
+
+    Exact hits are keyed on model, prompt template and the set of retrieved
+    chunk hashes, which together determine the prompt. Optionally, a query whose
+    embedding is within `similarity_threshold` (cosine) of a cached query for the
+    same model and template is answered from the cache before retrieval runs,
+    provided the caller confirms the chunks that answer was built from are
+    still stored; once any of them is replaced or deleted the entry is dropped.
+    Entries expire after `ttl_seconds`; beyond `max_entries` the least recently
+    used are evicted.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR_NAME, "responses.sqlite3"),
+                 ttl_seconds=RESPONSE_CACHE_TTL_SECONDS, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 similarity_threshold=RESPONSE_CACHE_SIMILARITY):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Streamlit serves sessions from several threads; serialize access ourselves.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    template TEXT NOT NULL,
+                    query TEXT,
+                    query_vector BLOB,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    chunk_hashes TEXT
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_scope ON responses (model, template)"
+            )
+
+    @staticmethod
+    def make_key(model, template, chunk_hashes):
+        payload = json.dumps([model, template, sorted(chunk_hashes)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _record(self, response):
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        metrics.inc("response_cache_requests_total", kind="exact", result="miss" if response is None else "hit")
+        return response
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return self._record(row[0] if row else None)
+
+    def get_similar(self, model, template, query_vector, chunks_stored):
+        """Return the response of the closest valid cached query above the threshold, if any.
+
+        `chunks_stored(chunk_hashes)` says whether the chunks an answer was
+        built from are all still stored; entries failing it are deleted.
+        """
+        if not self.similarity_threshold:
+            return None
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, query_vector, response, chunk_hashes FROM responses "
+                "WHERE model = ? AND template = ? AND query_vector IS NOT NULL "
+                "AND chunk_hashes IS NOT NULL AND created_at >= ?",
+                (model, template, now - self.ttl_seconds),
+            ).fetchall()
+        if not rows:
+            return None
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        cached = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        scores = cached @ query / (np.linalg.norm(cached, axis=1) * np.linalg.norm(query) + 1e-12)
+        for best in np.argsort(-scores):
+            if scores[best] < self.similarity_threshold:
+                break
+            key, _, response, chunk_hashes = rows[best]
+            if not chunks_stored(json.loads(chunk_hashes)):
+                logging.info("Dropping cached response built from chunks that are no longer stored")
+                with self._lock, self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                metrics.inc("response_cache_requests_total", kind="semantic", result="stale")
+                continue
+            logging.info(f"Semantic response cache hit (similarity {scores[best]:.3f})")
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            metrics.inc("response_cache_requests_total", kind="semantic", result="hit")
+            return response
+        # Not counted in `misses`: callers fall through to the exact lookup.
+        metrics.inc("response_cache_requests_total", kind="semantic", result="miss")
+        return None
+
+    def put(self, key, model, template, response, query=None, query_vector=None, chunk_hashes=None):
+        now = time.time()
+        blob = np.asarray(query_vector, dtype=np.float32).tobytes() if query_vector is not None else None
+        hashes = json.dumps(sorted(chunk_hashes)) if chunk_hashes is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, model, template, query, query_vector, response, created_at, last_used, chunk_hashes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, template, query, blob, response, now, now, hashes),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from src.constants import (
+    RETRIEVAL_MODE,
+    SERVER_BATCH_WAIT_MS,
+    SERVER_MAX_BATCH,
+    SERVER_MAX_CONCURRENCY,
+    SERVER_MAX_PENDING,
+)
+from src.metrics import configure_metrics, metrics
+from src.query import get_query_service
+
+MAX_BODY_BYTES = 1 << 20
+ROUTES = ("/health", "/metrics", "/search", "/ask")
+
+
+class QueryEmbeddingBatcher:
+    """Coalesces concurrent query embeddings into one model call.
+
+    The first query to arrive opens a batch that stays open for `max_wait_ms`
+    or until `max_batch` queries have joined; the whole batch is then embedded
+    together on the executor.
+    """
+
+    def __init__(self, embeddings, executor, max_batch=SERVER_MAX_BATCH, max_wait_ms=SERVER_BATCH_WAIT_MS):
+        self.embed_many = getattr(embeddings, "embed_queries", embeddings.embed_documents)
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._full = None
+        self.batches = 0
+        self.queries = 0
+
+    async def embed(self, query):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, future))
+        if len(self._pending) == 1:
+            self._full = asyncio.Event()
+            loop.create_task(self._flush_after_wait(self._full))
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _flush_after_wait(self, full):
+        try:
+            await asyncio.wait_for(full.wait(), self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            # Overflow starts the next batch right away.
+            self._full = asyncio.Event()
+            asyncio.get_running_loop().create_task(self._flush_after_wait(self._full))
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.embed_many, [query for query, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.queries += len(batch)
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class QueryServer:
+    """Minimal asyncio HTTP/1.1 JSON service over the shared QueryService.
+
+    Endpoints:
+        GET  /health
+        GET  /metrics     Prometheus text format
+        GET|POST /search  {"query", "k", "mode", "filters", "collections"}
+        POST /ask         {"query", "use_case", "k", "filters", "collections"}
+
+    `filters` is an object over chunk metadata such as
+    {"source": "https://...", "extractor": "youtube", "ingested_after": 1700000000};
+    in a GET query string it is passed JSON-encoded. `collections` lists the
+    knowledge bases to search (default: the service's own); in a GET query
+    string it is comma-separated.
+
+    At most `max_concurrency` requests run at once; up to `max_pending` more
+    wait for a slot, and anything beyond that is rejected with 503 so load
+    sheds at the door instead of piling up latency.
+    """
+
+    def __init__(self, service=None, max_concurrency=SERVER_MAX_CONCURRENCY, max_pending=SERVER_MAX_PENDING):
+        self.service = service or get_query_service()
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        # Blocking work (Qdrant calls, reranking, the LLM) runs on this pool;
+        # the Qdrant client underneath is a single pooled, process-wide client.
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="query")
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self.batcher = None
+
+    async def start(self, host="127.0.0.1", port=8000):
+        loop = asyncio.get_running_loop()
+        # Initialize the embedder and Qdrant connection before taking traffic.
+        vector_store = await loop.run_in_executor(self.executor, lambda: self.service.vector_store)
+        self.batcher = QueryEmbeddingBatcher(vector_store.embedder.model, self.executor)
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        logging.info(f"Query server listening on http://{host}:{port}")
+        return server
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                start = time.perf_counter()
+                status, payload = await self._dispatch(method, target, body)
+                route = urlsplit(target).path
+                metrics.observe(
+                    "http_request_seconds", time.perf_counter() - start,
+                    route=route if route in ROUTES else "other", status=status.value,
+                )
+                await self._respond(writer, status, payload)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload):
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+        )
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == "/health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if url.path == "/metrics":
+            return HTTPStatus.OK, metrics.render_prometheus()
+        handler = {"/search": self._search, "/ask": self._ask}.get(url.path)
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {"error": f"No route for {url.path}"}
+        try:
+            if method == "POST":
+                params = json.loads(body or b"{}")
+            elif method == "GET":
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            else:
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed")
+            if not isinstance(params, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+            if isinstance(params.get("filters"), str):
+                params["filters"] = json.loads(params["filters"])
+            if params.get("filters") is not None and not isinstance(params["filters"], dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "'filters' must be a JSON object")
+            if isinstance(params.get("collections"), str):
+                params["collections"] = [name for name in params["collections"].split(",") if name]
+            if not params.get("query"):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing 'query'")
+            if not isinstance(params["query"], str):
+                # Caught here: a bad query must not fail the embedding batch it would join.
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "'query' must be a string")
+
+            if self._waiting >= self.max_pending:
+                raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Server overloaded, retry later")
+            self._waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+            try:
+                start = time.perf_counter()
+                result = await handler(params)
+                result["took_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                return HTTPStatus.OK, result
+            finally:
+                self._slots.release()
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except (ValueError, KeyError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            logging.exception("Request failed")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+    async def _search(self, params):
+        query = params["query"]
+        k = int(params.get("k", 5))
+        mode = params.get("mode", RETRIEVAL_MODE)
+        filters = params.get("filters")
+        collections = params.get("collections")
+        # BM25 alone never looks at the query vector.
+        vector = None if mode == "sparse" else await self.batcher.embed(query)
+        docs = await asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            lambda: self.service.search(
+                query, k=k, mode=mode, query_vector=vector, filters=filters, collections=collections
+            ),
+        )
+        return {"results": [{"content": doc.page_content, "metadata": doc.metadata} for doc in docs]}
+
+    async def _ask(self, params):
+        query = params["query"]
+        use_case = params.get("use_case", "podcast_summary")
+        k = int(params.get("k", 5))
+        filters = params.get("filters")
+        collections = params.get("collections")
+        vector = await self.batcher.embed(query)
+        response = await asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            lambda: self.service.ask(
+                query, use_case=use_case, k=k, query_vector=vector, filters=filters, collections=collections
+            ),
+        )
+        return {"response": response}
+
+
+async def serve(host, port, **kwargs):
+    query_server = QueryServer(**kwargs)
+    server = await query_server.start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve /search and /ask over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrency", type=int, default=SERVER_MAX_CONCURRENCY)
+    parser.add_argument("--max-pending", type=int, default=SERVER_MAX_PENDING)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    configure_metrics()
+    asyncio.run(serve(args.host, args.port, max_concurrency=args.max_concurrency, max_pending=args.max_pending))
+
+
+if __name__ == "__main__":
+    main()
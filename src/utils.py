@@ -1,11 +1,14 @@
 from pathlib import Path
-from src.constants import DATA_DIR_NAME
+from src.constants import DATA_DIR_NAME, PDF_PAGE_SEPARATOR
  
-from langchain_community.document_loaders import TextLoader
-from langchain_community.document_loaders import DirectoryLoader
 import hashlib
+import json
+import os
+import uuid
 
 def load_doc_using_langchain():
+    # langchain_community takes about half a second to import; only this needs it.
+    from langchain_community.document_loaders import DirectoryLoader, TextLoader
     loader = DirectoryLoader(path="data/",
                             glob="**/*.txt",  # recursive glob
                             loader_cls=TextLoader,
@@ -33,6 +36,128 @@ def hash_text(text):
     return hashlib.md5(text.encode("utf-8")).hexdigest()
 
 
+def hash_file(path, block_size=1 << 20):
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_text_pages(path, separator=PDF_PAGE_SEPARATOR, read_size=1 << 16):
+    """Stream a text file as (page_number, text) without reading it whole.
+
+    Pages are delimited by `separator`; a file without any separator is
+    yielded as a single page with page number None.
+    """
+    page_number = 1
+    parts = []
+    paged = False
+    with open(path, "r", encoding="utf-8") as f:
+        for block in iter(lambda: f.read(read_size), ""):
+            pieces = block.split(separator)
+            parts.append(pieces[0])
+            for piece in pieces[1:]:
+                paged = True
+                yield page_number, "".join(parts)
+                page_number += 1
+                parts = [piece]
+    yield (page_number if paged else None), "".join(parts)
+
+
+def iter_text_blocks(path, separator=PDF_PAGE_SEPARATOR, read_size=1 << 16):
+    """Stream a text file as (page_number, offset, text) blocks of at most `read_size` characters.
+
+    `offset` is the character offset of the block in the file. A file is paged
+    when its first block contains `separator`; pages are then numbered from 1
+    and no block spans two pages. Unpaged files have page number None.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        block = f.read(read_size)
+        page_number = 1 if separator in block else None
+        offset = 0
+        while block:
+            pieces = block.split(separator) if page_number is not None else [block]
+            for i, piece in enumerate(pieces):
+                if i:
+                    offset += len(separator)
+                    page_number += 1
+                if piece:
+                    yield page_number, offset, piece
+                offset += len(piece)
+            block = f.read(read_size)
+
+
+def hash_to_point_id(chunk_hash):
+    """Deterministic Qdrant point ID for a chunk hash, so re-upserting the same
+    chunk overwrites the existing point instead of creating a duplicate."""
+    return str(uuid.UUID(hex=chunk_hash))
+
+
+def source_metadata_path(text_path):
+    """Sidecar file holding the source metadata of an extracted `.txt` file."""
+    return f"{os.path.splitext(text_path)[0]}.meta.json"
+
+
+def write_source_metadata(text_path, metadata):
+    with open(source_metadata_path(text_path), "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+
+
+def read_source_metadata(text_path):
+    """Source metadata recorded at extraction time, or {} for files without a sidecar."""
+    try:
+        with open(source_metadata_path(text_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def format_timestamp(seconds):
+    """"12:34" (or "1:02:03" past an hour) for a position in a video."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def transcript_timings_path(text_path):
+    """Sidecar holding the [start, duration] of each line of an extracted transcript."""
+    return f"{os.path.splitext(text_path)[0]}.segments.json"
+
+
+def write_transcript_timings(text_path, timings):
+    """Record per-line timings for the transcript just written to `text_path`."""
+    with open(transcript_timings_path(text_path), "w", encoding="utf-8") as f:
+        json.dump({"content_hash": hash_file(text_path), "timings": timings}, f)
+
+
+def read_transcript_timings(text_path, content_hash):
+    """Per-line [start, duration] timings, or None if there are none for this exact content.
+
+    Timings recorded for different content (the transcript was edited by
+    hand) would point at the wrong lines, so they are ignored.
+    """
+    try:
+        with open(transcript_timings_path(text_path), "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if sidecar.get("content_hash") != content_hash:
+        return None
+    return sidecar["timings"]
+
+
+def iter_transcript_segments(path, timings):
+    """Stream a timed transcript as (offset, start, duration, text), one segment per line."""
+    offset = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line, (start, duration) in zip(f, timings):
+            text = line.rstrip("\n")
+            if text:
+                yield offset, start, duration, text
+            offset += len(line)
+
+
 def get_all_dirs(path: Path):
     return [p for p in path.iterdir() if p.is_dir()]
 
@@ -0,0 +1,119 @@
+"""HTTPCache and ArticleExtractor against a local stand-in HTTP server.
+
+    python -m pytest tests
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.http_cache import HTTPCache
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+# Well past the 10k characters articles used to be cut to.
+PARAGRAPHS = [f"Paragraph {i} " + "about embeddings and retrieval. " * 8 for i in range(200)]
+ARTICLE = (
+    "<html><head><title>Stand-in</title></head><body><article>"
+    + "".join(f"<p>{paragraph}</p>" for paragraph in PARAGRAPHS)
+    + "</article></body></html>"
+).encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Request headers seen per path, in arrival order.
+    requests = {}
+
+    def do_GET(self):
+        self.requests.setdefault(self.path, []).append(dict(self.headers))
+        validated = self.path == "/validated"
+        if validated and (
+            self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED
+        ):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(ARTICLE)))
+        if validated:
+            self.send_header("ETag", ETAG)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(ARTICLE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandInHandler.requests = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    requests = pytest.importorskip("requests")
+    return HTTPCache(cache_dir=str(tmp_path / "http"), session=requests.Session())
+
+
+def read_body(response):
+    with open(response.path, "rb") as f:
+        return f.read()
+
+
+def test_first_fetch_stores_body_and_validators(server, cache):
+    response = cache.fetch(f"{server}/validated")
+
+    assert not response.from_cache
+    assert read_body(response) == ARTICLE
+    assert response.encoding == "utf-8"
+    meta = cache._load_meta(cache._paths(f"{server}/validated")[1], response.path)
+    assert meta["etag"] == ETAG
+    assert meta["last_modified"] == LAST_MODIFIED
+
+
+def test_refetch_revalidates_and_serves_cached_body_on_304(server, cache):
+    cache.fetch(f"{server}/validated")
+    response = cache.fetch(f"{server}/validated")
+
+    first, second = StandInHandler.requests["/validated"]
+    assert "If-None-Match" not in first
+    assert second["If-None-Match"] == ETAG
+    assert second["If-Modified-Since"] == LAST_MODIFIED
+    assert response.from_cache
+    assert read_body(response) == ARTICLE
+
+
+def test_response_without_validators_is_not_revalidated(server, cache):
+    cache.fetch(f"{server}/plain")
+    response = cache.fetch(f"{server}/plain")
+
+    for headers in StandInHandler.requests["/plain"]:
+        assert "If-None-Match" not in headers
+        assert "If-Modified-Since" not in headers
+    assert not response.from_cache
+    assert read_body(response) == ARTICLE
+
+
+def test_article_extractor_keeps_the_whole_article(server, cache, tmp_path):
+    pytest.importorskip("bs4")
+    from src.get_knowledge import ArticleExtractor
+    from src.html_extraction import SoupEngine
+
+    extractor = ArticleExtractor(cache=cache, engine=SoupEngine())
+    output_path = str(tmp_path / "article.txt")
+
+    assert extractor.process_source(f"{server}/validated", output_path) == output_path
+    with open(output_path, encoding="utf-8") as f:
+        text = f.read()
+    assert len(text) > 10000
+    assert text.splitlines() == [paragraph.strip() for paragraph in PARAGRAPHS]